@@ -0,0 +1,220 @@
+"""Timings for parsing, every registered rule and report writing.
+
+Measures the cold import time of the gedcom package, generates synthetic
+trees of the requested sizes, times load_gedcom(), each rule of
+check_anomalies(), print_individuals_and_families() and the CSV and JSON
+Lines exports on them, and writes the results as JSON.
+Given a baseline written by an earlier run, it also flags timings that got
+slower and rules whose growth with tree size got steeper, which is what an
+accidental O(n^2) looks like:
+
+    python benchmark.py --sizes 1000,100000 --output bench.json
+    python benchmark.py --sizes 1000,100000 --baseline bench.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import gedcom
+
+FIRST_NAMES = ["Ann", "Bob", "Cara", "Dan", "Eve", "Finn", "Gail", "Hugo", "Ida", "Jon", "Kay", "Lee",
+               "Mia", "Ned", "Ola", "Pat", "Quin", "Rose", "Sam", "Tess", "Uma", "Vic", "Wes", "Zoe"]
+SURNAMES = [f"Surname{n}" for n in range(500)]
+MONTH_NAMES = list(gedcom.MONTHS)
+
+def _date(rng, year):
+    return f"{rng.randint(1, 28)} {rng.choice(MONTH_NAMES)} {year}"
+
+def generate_tree(people, seed=0):
+    """GEDCOM text for a tree of about this many people.
+
+    Couples are formed from the oldest unmarried people of each sex (or new
+    founders when there are none) and get zero to four children, so the
+    tree grows generation by generation like a real one.  A few dates are
+    deliberately inconsistent so that the rules have something to report.
+    """
+    rng = random.Random(seed)
+    persons = []      # [sex, name, birth year, death year, child family, [spouse families]]
+    families = []     # (husband, wife, marriage year, divorce year, [children])
+    single = {'M': [], 'F': []}
+    next_single = {'M': 0, 'F': 0}
+
+    def person(sex, surname, birth_year, child_family=None):
+        death_year = birth_year + rng.randint(20, 95) if rng.random() < 0.4 else None
+        persons.append([sex, f"{rng.choice(FIRST_NAMES)} /{surname}/", birth_year, death_year, child_family, []])
+        single[sex].append(len(persons) - 1)
+        return len(persons) - 1
+
+    def spouse(sex):
+        if next_single[sex] < len(single[sex]):
+            next_single[sex] += 1
+            return single[sex][next_single[sex] - 1]
+        return person(sex, rng.choice(SURNAMES), 1500 + rng.randint(0, 30))
+
+    while len(persons) < people:
+        husband, wife = spouse('M'), spouse('F')
+        married = max(persons[husband][2], persons[wife][2]) + rng.randint(16, 35)
+        divorced = married + rng.randint(1, 30) if rng.random() < 0.1 else None
+        family_index = len(families)
+        children = []
+        born = married + rng.randint(-1, 2)
+        for _ in range(rng.choice((0, 1, 2, 2, 3, 3, 4))):
+            surname = persons[husband][1].split('/')[1]
+            children.append(person(rng.choice('MF'), surname, born, family_index))
+            born += rng.randint(1, 4)
+        families.append((husband, wife, married, divorced, children))
+        persons[husband][5].append(family_index)
+        persons[wife][5].append(family_index)
+
+    lines = ["0 HEAD", "1 CHAR UTF-8"]
+    for index, (sex, name, birth_year, death_year, child_family, spouse_families) in enumerate(persons):
+        lines += [f"0 @I{index}@ INDI", f"1 NAME {name}", f"1 SEX {sex}", "1 BIRT", f"2 DATE {_date(rng, birth_year)}"]
+        if death_year is not None:
+            lines += ["1 DEAT Y", f"2 DATE {_date(rng, death_year)}"]
+        if child_family is not None:
+            lines.append(f"1 FAMC @F{child_family}@")
+        lines += [f"1 FAMS @F{family}@" for family in spouse_families]
+    for index, (husband, wife, married, divorced, children) in enumerate(families):
+        lines += [f"0 @F{index}@ FAM", f"1 HUSB @I{husband}@", f"1 WIFE @I{wife}@"]
+        lines += [f"1 CHIL @I{child}@" for child in children]
+        lines += ["1 MARR", f"2 DATE {_date(rng, married)}"]
+        if divorced is not None:
+            lines += ["1 DIV", f"2 DATE {_date(rng, divorced)}"]
+    lines.append("0 TRLR")
+    return "\n".join(lines) + "\n"
+
+def _timed(function, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def import_time(repeat=3):
+    """Seconds a fresh interpreter spends importing gedcom, from
+    -X importtime, with the bytecode cache already written."""
+    env = {name: value for name, value in os.environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+    directory = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, '-X', 'importtime', '-c', 'import gedcom']
+    subprocess.run(command, cwd=directory, env=env, capture_output=True, check=True)
+    best = math.inf
+    for _ in range(repeat):
+        report = subprocess.run(command, cwd=directory, env=env, capture_output=True, text=True, check=True).stderr
+        # "import time: self [us] | cumulative | name"; the package is the last line
+        line = [line for line in report.splitlines() if line.rstrip().endswith('| gedcom')][-1]
+        best = min(best, int(line.split('|')[1]) / 1e6)
+    return best
+
+def run(sizes, repeat=3, include=None, exclude=None, max_cost=None):
+    """Time every stage on a generated tree per size; returns the results
+    as a JSON-ready dict.  Each timing is the best of repeat runs."""
+    results = {'python': platform.python_version(), 'machine': platform.machine(), 'import': import_time(repeat), 'sizes': {}}
+    print(f"import {results['import'] * 1000:.1f}ms", file=sys.stderr)
+    for size in sizes:
+        text = generate_tree(size)
+        with tempfile.NamedTemporaryFile('w', suffix='.ged', delete=False) as file:
+            file.write(text)
+        try:
+            timings = {'lines': text.count('\n'), 'parse': _timed(lambda: gedcom.load_gedcom(file.name), repeat), 'rules': {}}
+        finally:
+            os.remove(file.name)
+        with open(os.devnull, 'w') as sink, redirect_stdout(sink):
+            for registered in gedcom.select_rules(include, exclude, max_cost):
+                timings['rules'][registered.story] = _timed(registered.check, repeat)
+        timings['report'] = _timed(lambda: gedcom.print_individuals_and_families(os.devnull), repeat)
+        with tempfile.TemporaryDirectory() as directory:
+            for format in ('csv', 'jsonl'):
+                output_file = os.path.join(directory, 'report.txt')
+                timings[f'export_{format}'] = _timed(lambda: gedcom.export_individuals_and_families(output_file, format), repeat)
+        results['sizes'][str(size)] = timings
+        print(f"{size} people: parse {timings['parse']:.3f}s ({timings['lines'] / timings['parse'] / 1e6:.2f}M lines/s), rules {sum(timings['rules'].values()):.3f}s, "
+              f"report {timings['report']:.3f}s", file=sys.stderr)
+    return results
+
+def _stages(timings):
+    yield 'parse', timings['parse']
+    yield 'report', timings['report']
+    for format in ('csv', 'jsonl'):
+        if f'export_{format}' in timings:
+            yield f'export_{format}', timings[f'export_{format}']
+    yield from timings['rules'].items()
+
+def _growth(results):
+    # Exponent k in time ~ size**k between the two largest sizes, per stage
+    sizes = sorted(results['sizes'], key=int)
+    if len(sizes) < 2:
+        return {}
+    small, large = sizes[-2:]
+    ratio = math.log(int(large) / int(small))
+    growth = {}
+    small_timings = dict(_stages(results['sizes'][small]))
+    for stage, seconds in _stages(results['sizes'][large]):
+        if small_timings.get(stage, 0) > 0 and seconds > 0:
+            growth[stage] = math.log(seconds / small_timings[stage]) / ratio
+    return growth
+
+def compare(results, baseline, slowdown=1.5, floor=0.005, growth_margin=0.4):
+    """Regressions of results against baseline, as human-readable strings.
+
+    A stage regresses when it is more than slowdown times slower than the
+    baseline at the same size (ignoring stages faster than floor seconds in
+    both), or when its growth exponent across the two largest sizes exceeds
+    the baseline's by more than growth_margin.
+    """
+    regressions = []
+    before = baseline.get('import')
+    if before and results['import'] > before * slowdown and results['import'] >= floor:
+        regressions.append(f"import: {before * 1000:.1f}ms -> {results['import'] * 1000:.1f}ms")
+    for size, timings in results['sizes'].items():
+        old = dict(_stages(baseline['sizes'].get(size, {'parse': 0, 'report': 0, 'rules': {}})))
+        for stage, seconds in _stages(timings):
+            before = old.get(stage)
+            if before and max(seconds, before) >= floor and seconds > before * slowdown:
+                regressions.append(f"{stage} at {size} people: {before:.4f}s -> {seconds:.4f}s ({seconds / before:.1f}x)")
+    old_growth = _growth(baseline)
+    for stage, exponent in _growth(results).items():
+        if stage in old_growth and exponent > old_growth[stage] + growth_margin:
+            regressions.append(f"{stage} grows as n^{exponent:.2f}, was n^{old_growth[stage]:.2f}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time parsing, each rule and report writing on synthetic trees.")
+    parser.add_argument('--sizes', default='1000,100000,1000000', help="comma-separated tree sizes in people")
+    parser.add_argument('--repeat', type=int, default=3, help="take the best of this many runs")
+    parser.add_argument('--rules', help="comma-separated user stories or cost classes to time (default: all)")
+    parser.add_argument('--max-cost', choices=gedcom.COSTS, help="only time rules up to this cost class")
+    parser.add_argument('--output', help="write the results to this JSON file (default: stdout)")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--slowdown', type=float, default=1.5, help="slowdown factor counted as a regression")
+    args = parser.parse_args(argv)
+    include = args.rules.split(',') if args.rules else None
+    try:
+        gedcom.select_rules(include, None, args.max_cost)
+    except ValueError as error:
+        parser.error(str(error))
+    results = run([int(size) for size in args.sizes.split(',')], args.repeat, include, None, args.max_cost)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.slowdown)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
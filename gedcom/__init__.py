@@ -0,0 +1,47 @@
+"""Parse GEDCOM family trees and report anomalies in them.
+
+Importing the package has no side effects and loads only the standard
+library; prettytable and NumPy are imported by the features that use
+them.  The SQLite store, the record index, the NumPy engine and the
+command line are loaded on first access.  Run the command line with
+`python -m gedcom`.
+"""
+from .records import (DATE_FIELDS, MONTHS, DateRange, Family, Individual, add_months, calculate_age, months_between, parse_date,
+                      valid_tags)
+from .kinship import ORDINALS, Relations, kinship_name
+from .ancestry import Ancestry
+from .duplicates import NAME_THRESHOLD, near_duplicates, normalize_name, similarity, soundex
+from .tree import families, individuals, relations, sorted_child_births
+from .parser import iter_records, process_gedcom
+from .snapshot import DEFAULT_CACHE_BYTES, PARSER_VERSION, file_digest, load_gedcom
+from .report import (EXPORT_FORMATS, FAMILY_COLUMNS, INDIVIDUAL_COLUMNS, export_individuals_and_families,
+                     family_rows, individual_rows, print_individuals_and_families)
+from .rules import COSTS, ENGINES, RULES, Rule, check_anomalies, in_shard, rule, select_rules
+from .incremental import AnomalySet, collect_anomalies, revalidate, revalidate_file
+from .sinks import ANOMALY_FORMATS, Anomaly, JsonlSink, ListSink, TextSink, emit, open_sink
+from .profiling import Measurement, Profile, add_hook, measure, remove_hook
+
+_LAZY = {
+    'RecordIndex': 'index',
+    'INDEX_VERSION': 'index',
+    'SqliteStore': 'store',
+    'SQL_RULES': 'store',
+    'DateColumns': 'vector',
+    'VECTOR_RULES': 'vector',
+    'main': 'cli',
+    'expand_inputs': 'cli',
+    'validate_file': 'cli',
+    'validate_files': 'cli',
+    'EXIT_OK': 'cli',
+    'EXIT_ANOMALIES': 'cli',
+    'EXIT_USAGE': 'cli',
+    'EXIT_FAILED': 'cli',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        value = getattr(import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
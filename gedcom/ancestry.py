@@ -0,0 +1,206 @@
+"""Ancestor/descendant queries at any depth, and genealogical cycles."""
+from itertools import chain
+
+from .profiling import paused_collector
+
+class Ancestry:
+    """The ancestor relation of a Relations index, preprocessed for queries.
+
+    People are linked parent -> child through the families they are a
+    spouse or a child in.  The graph is put in topological order with
+    Kahn's algorithm; whatever that cannot order lies on or below a cycle,
+    and is split into strongly connected components so that every cycle
+    (someone who is their own ancestor) is found and the rest of the graph
+    can still be ordered.  Each component then gets its generation (longest
+    parent chain above it) and a post-order interval from one depth-first
+    walk, where a descendant's interval always lies inside its ancestor's.
+    is_ancestor() answers from those labels in constant time when they rule
+    the pair out, which is nearly always, and otherwise searches upwards
+    from the younger person only through parents the labels allow.
+    Everything is iterative, so trees of any depth are fine.
+    """
+
+    def __init__(self, relations):
+        with paused_collector():
+            self._build(relations)
+
+    def _build(self, relations):
+        # Relations links both ways, so these are everyone with a parent or
+        # a child
+        self.names = list(dict.fromkeys(chain(relations.spouse_families, relations.child_families)))
+        ids = self.ids = {person_id: index for index, person_id in enumerate(self.names)}
+        children = [[] for _ in self.names]
+        family_children = relations.family_children
+        for family_id, parent_ids in relations.family_parents.items():
+            child_ids = family_children.get(family_id)
+            if child_ids:
+                kids = [ids[child_id] for child_id in child_ids]
+                for parent_id in parent_ids:
+                    children[ids[parent_id]] += kids
+        self.component, component_children, cycles = self._condense(children)
+        self._cyclic = {self.component[people[0]] for people in cycles}
+        # Each cycle as the IDs of the people on it
+        self.cycles = [tuple(self.names[index] for index in people) for people in cycles]
+        self._label(component_children)
+
+    @staticmethod
+    def _condense(children):
+        count = len(children)
+        indegree = [0] * count
+        for kids in children:
+            for kid in kids:
+                indegree[kid] += 1
+        order = [index for index in range(count) if not indegree[index]]
+        for index in order:  # order grows while it is walked
+            for kid in children[index]:
+                indegree[kid] -= 1
+                if not indegree[kid]:
+                    order.append(kid)
+
+        # Components: one per person Kahn could order, then the strongly
+        # connected components of the rest (Tarjan's algorithm, iterative),
+        # which it emits children first
+        component = [-1] * count
+        members = []
+        for index in order:
+            component[index] = len(members)
+            members.append((index,))
+        if len(order) < count:
+            leftover = [index for index in range(count) if component[index] < 0]
+            found = _strong_components(leftover, children)
+            for people in reversed(found):
+                for index in people:
+                    component[index] = len(members)
+                members.append(tuple(people))
+
+        if len(order) == count:
+            # No cycles: every component is one person
+            return component, [[component[kid] for kid in children[index]] for index in order], []
+        component_children = []
+        cycles = []
+        for people in members:
+            own = component[people[0]]
+            kids = set()
+            cyclic = False
+            for index in people:
+                for kid in children[index]:
+                    if component[kid] == own:
+                        cyclic = True
+                    else:
+                        kids.add(component[kid])
+            component_children.append(kids)
+            if cyclic:
+                cycles.append(people)
+        return component, component_children, cycles
+
+    def _label(self, component_children):
+        count = len(component_children)
+        parents = [[] for _ in range(count)]
+        generation = [0] * count
+        # Components are numbered in topological order, parents first
+        for index, kids in enumerate(component_children):
+            for kid in kids:
+                parents[kid].append(index)
+                if generation[kid] <= generation[index]:
+                    generation[kid] = generation[index] + 1
+        post = [-1] * count
+        low = [0] * count
+        counter = 0
+        for root in range(count):
+            if post[root] >= 0 or parents[root]:
+                continue
+            post[root] = -2  # on the stack
+            stack = [(root, iter(component_children[root]))]
+            while stack:
+                index, pending = stack[-1]
+                for kid in pending:
+                    if post[kid] == -1:
+                        post[kid] = -2
+                        stack.append((kid, iter(component_children[kid])))
+                        break
+                else:
+                    stack.pop()
+                    lowest = counter
+                    for kid in component_children[index]:
+                        if low[kid] < lowest:
+                            lowest = low[kid]
+                    post[index] = counter
+                    low[index] = lowest
+                    counter += 1
+        self._parents = parents
+        self._generation = generation
+        self._post = post
+        self._low = low
+
+    def is_ancestor(self, a, b):
+        """Whether a is a parent, grandparent, ... of b; true for a == b only
+        when a is in a cycle, i.e. their own ancestor."""
+        index_a = self.ids.get(a)
+        index_b = self.ids.get(b)
+        if index_a is None or index_b is None:
+            return False
+        a, b = self.component[index_a], self.component[index_b]
+        if a == b:
+            return a in self._cyclic
+        generation, post, low = self._generation, self._post, self._low
+        if not (generation[a] < generation[b] and low[a] <= low[b] and post[b] < post[a]):
+            return False
+        seen = {b}
+        stack = [b]
+        while stack:
+            for parent in self._parents[stack.pop()]:
+                if parent == a:
+                    return True
+                if parent not in seen and generation[a] < generation[parent] and low[a] <= low[parent] and post[parent] < post[a]:
+                    seen.add(parent)
+                    stack.append(parent)
+        return False
+
+    def in_cycle(self, person_id):
+        """Whether person_id is their own ancestor."""
+        index = self.ids.get(person_id)
+        return index is not None and self.component[index] in self._cyclic
+
+def _strong_components(nodes, children):
+    # Tarjan's algorithm without recursion, restricted to nodes
+    wanted = set(nodes)
+    number = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    found = []
+    for start in nodes:
+        if start in number:
+            continue
+        number[start] = low[start] = len(number)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(children[start]))]
+        while work:
+            node, pending = work[-1]
+            for kid in pending:
+                if kid not in wanted:
+                    continue
+                if kid not in number:
+                    number[kid] = low[kid] = len(number)
+                    stack.append(kid)
+                    on_stack.add(kid)
+                    work.append((kid, iter(children[kid])))
+                    break
+                if kid in on_stack:
+                    low[node] = min(low[node], number[kid])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == number[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    found.append(component)
+    return found
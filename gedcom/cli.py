@@ -0,0 +1,177 @@
+"""The command line: interactive single-file mode and batch validation."""
+import glob
+import json
+import os
+import sys
+from contextlib import nullcontext
+
+from .parser import process_gedcom
+from .profiling import Profile
+from .report import EXPORT_FORMATS, export_individuals_and_families
+from .rules import COSTS, ENGINES, RULES, check_anomalies, select_rules
+from .sinks import ANOMALY_FORMATS, open_sink
+from .snapshot import load_gedcom
+
+EXIT_OK = 0         # every file parsed and no check reported an error
+EXIT_ANOMALIES = 1  # some file has ERROR lines
+EXIT_USAGE = 2      # bad command line (argparse's own exit status)
+EXIT_FAILED = 3     # some file could not be read or processed
+
+PROFILE_FORMATS = ('json', 'text')
+
+def expand_inputs(patterns):
+    """Turn file names, directories (searched recursively for *.ged) and
+    glob patterns into a sorted, de-duplicated list of paths.  A name that
+    matches nothing is kept, so that it is reported as failed."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, _, names in os.walk(pattern):
+                paths += [os.path.join(directory, name) for name in names if name.lower().endswith('.ged')]
+        else:
+            paths += glob.glob(pattern, recursive=True) or [pattern]
+    return sorted(set(paths))
+
+def _result_names(paths):
+    # One output name per input; same-named files from different
+    # directories get a numeric suffix.
+    names = []
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = stem
+        suffix = 1
+        while name in used:
+            suffix += 1
+            name = f"{stem}-{suffix}"
+        used.add(name)
+        names.append(name)
+    return names
+
+def validate_file(file_path, output_dir, name, include=None, exclude=None, max_cost=None, cache_dir=None, workers=1,
+                  format='table', engine='python', profile=None, anomaly_format='text'):
+    """Parse, check and report one file into output_dir, as <name>.anomalies.txt
+    (the check output, or <name>.anomalies.jsonl with one Anomaly object per
+    line) and <name>.txt (the tables; see export_individuals_and_families
+    for the other formats).  With a profile
+    format, the timings of each phase and rule go to <name>.profile.json or
+    <name>.profile.txt.  Returns a summary dict."""
+    summary = {'file': file_path, 'name': name, 'status': 'ok', 'errors': 0, 'lines': 0}
+    try:
+        with Profile() if profile else nullcontext() as profiled:
+            load_gedcom(file_path, cache_dir, workers=workers)
+            suffix = 'txt' if anomaly_format == 'text' else anomaly_format
+            with open(os.path.join(output_dir, f"{name}.anomalies.{suffix}"), 'w') as output:
+                sink = open_sink(output, anomaly_format)
+                check_anomalies(workers=workers, include=include, exclude=exclude, max_cost=max_cost, engine=engine, sink=sink)
+            export_individuals_and_families(os.path.join(output_dir, f"{name}.txt"), format)
+        if profile:
+            profiled.write(os.path.join(output_dir, f"{name}.profile.{'txt' if profile == 'text' else 'json'}"))
+    except Exception as error:
+        # One malformed submission must not stop the rest of the batch
+        summary.update(status='failed', error=f"{type(error).__name__}: {error}")
+        return summary
+    summary['lines'] = sum(sink.counts.values())
+    summary['errors'] = sink.counts['error']
+    if summary['errors']:
+        summary['status'] = 'anomalies'
+    return summary
+
+def _validate_task(task):
+    return validate_file(*task)
+
+def validate_files(paths, output_dir, jobs=1, include=None, exclude=None, max_cost=None, cache_dir=None, format='table',
+                   engine='python', profile=None, anomaly_format='text'):
+    """validate_file() every path on a pool of jobs processes, yielding the
+    summaries in input order."""
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(path, output_dir, name, include, exclude, max_cost, cache_dir, 1, format, engine, profile, anomaly_format)
+             for path, name in zip(paths, _result_names(paths))]
+    if jobs <= 1 or len(tasks) <= 1:
+        yield from map(_validate_task, tasks)
+        return
+    # Each worker replaces its own copy of the tree per file, so the pool
+    # only ever holds jobs trees at once.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(jobs) as pool:
+        yield from pool.map(_validate_task, tasks, chunksize=max(1, min(64, len(tasks) // (jobs * 8))))
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Parse GEDCOM files and report anomalies. "
+                                     "Without files, prompts for one input and one output path.")
+    parser.add_argument('files', nargs='*', help="GEDCOM files, directories to search for *.ged, or glob patterns")
+    parser.add_argument('--output-dir', default='.', help="where to write <name>.txt, <name>.anomalies.txt and summary.json (default: .)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="number of files to process at once (default: one per CPU)")
+    parser.add_argument('--workers', type=int, default=1, help="number of processes to parse and check one file on")
+    parser.add_argument('--rules', help="comma-separated user stories or cost classes to run (default: all)")
+    parser.add_argument('--skip', help="comma-separated user stories or cost classes not to run")
+    parser.add_argument('--max-cost', choices=COSTS, help="only run rules up to this cost class")
+    parser.add_argument('--cache-dir', help="directory for parsed-tree snapshots; an unchanged file is loaded from there")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='table',
+                        help="report format; csv and jsonl stream <name>.individuals.* and <name>.families.* row by row")
+    parser.add_argument('--engine', choices=ENGINES, default='python', help="numpy runs the date rules US01-US10 on array columns")
+    parser.add_argument('--anomaly-format', choices=ANOMALY_FORMATS, default='text',
+                        help="jsonl writes <name>.anomalies.jsonl with the rule, severity and record IDs of each anomaly")
+    parser.add_argument('--profile', choices=PROFILE_FORMATS,
+                        help="time and count each phase and rule, into <name>.profile.* (to stderr when prompting)")
+    parser.add_argument('--list-rules', action='store_true', help="list the registered rules and exit")
+    args = parser.parse_args(argv)
+    include = args.rules.split(',') if args.rules else None
+    exclude = args.skip.split(',') if args.skip else None
+    try:
+        select_rules(include, exclude, args.max_cost)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.list_rules:
+        for registered in RULES:
+            print(f"{registered.story}  {registered.cost:<9}  {registered.check.__name__}  needs: {', '.join(registered.needs)}")
+        return EXIT_OK
+
+    if not args.files:
+        with Profile() if args.profile else nullcontext() as profiled:
+            # Prompt for the GEDCOM file path
+            file_path = input("Please enter the path to the GEDCOM file: ")
+
+            # Process the GEDCOM file
+            if args.cache_dir:
+                load_gedcom(file_path, args.cache_dir, workers=args.workers)
+            else:
+                process_gedcom(file_path, echo=True)
+            # Check for anomalies
+            check_anomalies(workers=args.workers, include=include, exclude=exclude, max_cost=args.max_cost, engine=args.engine)
+
+            # Prompt for the output file path
+            output_file_path = input("Please enter the path for the output file: ")
+
+            # Write individuals and families to the output file
+            export_individuals_and_families(output_file_path, args.format)
+        if args.profile == 'json':
+            json.dump(profiled.as_dict(), sys.stderr, indent=1)
+            print(file=sys.stderr)
+        elif args.profile:
+            sys.stderr.write(profiled.text())
+        return EXIT_OK
+
+    paths = expand_inputs(args.files)
+    if args.workers > 1:
+        # Checks of one file are then sharded; files are not also run in parallel
+        os.makedirs(args.output_dir, exist_ok=True)
+        results = (validate_file(path, args.output_dir, name, include, exclude, args.max_cost, args.cache_dir,
+                                 args.workers, args.format, args.engine, args.profile, args.anomaly_format)
+                   for path, name in zip(paths, _result_names(paths)))
+    else:
+        results = validate_files(paths, args.output_dir, args.jobs, include, exclude, args.max_cost, args.cache_dir, args.format,
+                                 args.engine, args.profile, args.anomaly_format)
+    summaries = []
+    for summary in results:
+        summaries.append(summary)
+        detail = summary.get('error') or f"{summary['errors']} errors, {summary['lines']} lines"
+        print(f"{summary['status']:<9}  {summary['file']}: {detail}")
+    counts = {status: sum(1 for s in summaries if s['status'] == status) for status in ('ok', 'anomalies', 'failed')}
+    with open(os.path.join(args.output_dir, 'summary.json'), 'w') as output:
+        json.dump({'files': len(summaries), **counts, 'results': summaries}, output, indent=1)
+    print(f"{len(summaries)} files: {counts['ok']} ok, {counts['anomalies']} with anomalies, {counts['failed']} failed")
+    if counts['failed']:
+        return EXIT_FAILED
+    return EXIT_ANOMALIES if counts['anomalies'] else EXIT_OK
@@ -0,0 +1,259 @@
+"""Resident validation service speaking JSON-RPC 2.0 over a Unix socket.
+
+Each request and response is one line of JSON.  Parsed trees are kept in a
+memory-bounded LRU cache keyed by path, together with the anomalies last
+collected for them, so repeated requests against an unchanged file skip
+parsing and checking altogether, and a file that changed a little is
+brought up to date with revalidate_file() rather than a full run:
+
+    python -m gedcom.daemon --socket /tmp/gedcom.sock &
+    python -m gedcom.daemon --socket /tmp/gedcom.sock --call validate '{"path": "tree.ged"}'
+
+Methods:
+    parse     {path}                            -> tree sizes
+    validate  {path, rules?, skip?, max_cost?}  -> anomaly lines
+    query     {path, id}                        -> one record and its links
+    stats     {}                                -> cache contents
+    shutdown  {}                                -> stops the daemon
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+
+from .incremental import collect_anomalies, revalidate_file
+from .kinship import Relations
+from .records import DATE_FIELDS, Individual
+from .rules import select_rules
+from .snapshot import load_gedcom
+from .tree import _install_tree, families, individuals, relations
+
+# Whole-tree footprint per record, from the README's memory sizing
+# (about 1060 B per person with one family per two people).
+BYTES_PER_RECORD = 707
+DEFAULT_MAX_BYTES = 4 << 30
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+class _Entry:
+    __slots__ = ('signature', 'tree', 'size', 'anomalies')
+
+    def __init__(self, signature, tree, size):
+        self.signature = signature
+        self.tree = tree
+        self.size = size
+        self.anomalies = None
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _current_tree():
+    # Shallow copies: the records themselves are shared with the loaded tree
+    copy = Relations()
+    for name in Relations.LINKS:
+        getattr(copy, name).update(getattr(relations, name))
+    return dict(individuals), dict(families), copy
+
+class TreeCache:
+    """Parsed trees by path, least recently used first out once the
+    estimated total size passes max_bytes.
+
+    Only one tree can be loaded into gedcom's module state at a time;
+    use() installs the requested one, which is free when it is already
+    the loaded one.  Not thread-safe: the server serialises requests.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.loaded = None  # path whose tree is in gedcom's module state
+
+    def use(self, path):
+        """Load the tree for path, parsing it only if it is new or changed
+        on disk.  Returns its cache entry."""
+        path = os.path.abspath(path)
+        signature = _file_signature(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry.signature == signature:
+            self.entries.move_to_end(path)
+            if self.loaded != path:
+                _install_tree(entry.tree)
+                self.loaded = path
+            return entry
+        if entry is not None and entry.anomalies is not None:
+            # Patch the old tree and its anomalies with just the edits
+            if self.loaded != path:
+                _install_tree(entry.tree)
+            self.loaded = path
+            revalidate_file(entry.anomalies, path)
+            anomalies = entry.anomalies
+        else:
+            self.loaded = None
+            load_gedcom(path, self.cache_dir)
+            self.loaded = path
+            anomalies = None
+        self.entries.pop(path, None)
+        entry = _Entry(signature, _current_tree(), BYTES_PER_RECORD * (len(individuals) + len(families)))
+        entry.anomalies = anomalies
+        self.entries[path] = entry
+        self._evict()
+        return entry
+
+    def _evict(self):
+        total = sum(entry.size for entry in self.entries.values())
+        # The newest tree is kept even if it alone is over the limit
+        while total > self.max_bytes and len(self.entries) > 1:
+            path, entry = self.entries.popitem(last=False)
+            total -= entry.size
+            if self.loaded == path:
+                self.loaded = None
+
+class Service:
+    """The RPC methods, dispatched by handle()."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.stopping = False
+
+    def handle(self, line):
+        """Answer one request line with one response object (None for a
+        notification, i.e. a request without an id)."""
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as error:
+                raise RpcError(PARSE_ERROR, f"parse error: {error}")
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise RpcError(INVALID_REQUEST, "invalid request")
+            request_id = request.get('id')
+            method = getattr(self, f"rpc_{request['method']}", None)
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"method not found: {request['method']}")
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            with self.lock:
+                try:
+                    result = method(**params)
+                except TypeError as error:
+                    raise RpcError(INVALID_PARAMS, str(error))
+                except ValueError as error:
+                    raise RpcError(INVALID_PARAMS, str(error))
+                except OSError as error:
+                    raise RpcError(SERVER_ERROR, f"{type(error).__name__}: {error}")
+        except RpcError as error:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': error.code, 'message': str(error)}}
+        if 'id' not in request:
+            return None
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def rpc_parse(self, path):
+        self.cache.use(path)
+        return {'individuals': len(individuals), 'families': len(families)}
+
+    def rpc_validate(self, path, rules=None, skip=None, max_cost=None):
+        selection = (rules, skip, max_cost)
+        select_rules(*selection)
+        entry = self.cache.use(path)
+        if entry.anomalies is None or entry.anomalies.selection != selection:
+            entry.anomalies = collect_anomalies(*selection)
+        lines = list(entry.anomalies.lines())
+        return {'lines': lines, 'errors': sum(1 for line in lines if line.upper().startswith('ERROR'))}
+
+    def rpc_query(self, path, id):
+        self.cache.use(path)
+        record = individuals.get(id) or families.get(id)
+        if record is None:
+            raise ValueError(f"no record {id}")
+        fields = {name: getattr(record, name) for name in type(record).__slots__ if name not in DATE_FIELDS.values()}
+        if isinstance(record, Individual):
+            fields['child_families'] = list(relations.child_families.get(id, ()))
+            fields['spouse_families'] = list(relations.spouse_families.get(id, ()))
+            fields['parents'] = relations.parents(id)
+        else:
+            fields['children'] = list(relations.family_children.get(id, ()))
+        return fields
+
+    def rpc_stats(self):
+        return {'max_bytes': self.cache.max_bytes, 'loaded': self.cache.loaded,
+                'trees': [{'path': path, 'bytes': entry.size, 'validated': entry.anomalies is not None}
+                          for path, entry in self.cache.entries.items()]}
+
+    def rpc_shutdown(self):
+        self.stopping = True
+        return True
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.service.handle(line)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+            if self.server.service.stopping:
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # left over from a daemon that did not exit cleanly
+        super().__init__(socket_path, _Handler)
+        self.service = service
+
+def call(socket_path, method, **params):
+    """Send one request to a running daemon and return its result, raising
+    RpcError if it answers with an error."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).encode() + b'\n')
+        with client.makefile('rb') as responses:
+            response = json.loads(responses.readline())
+    if 'error' in response:
+        raise RpcError(response['error']['code'], response['error']['message'])
+    return response['result']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve parse/validate/query requests for GEDCOM files over a Unix socket.")
+    parser.add_argument('--socket', required=True, help="path of the Unix socket")
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES, help="estimated memory for cached trees")
+    parser.add_argument('--cache-dir', help="directory for parsed-tree snapshots, as for python -m gedcom")
+    parser.add_argument('--call', nargs=2, metavar=('METHOD', 'PARAMS'), help="send one request to a running daemon and print the result")
+    args = parser.parse_args(argv)
+    if args.call:
+        try:
+            print(json.dumps(call(args.socket, args.call[0], **json.loads(args.call[1])), indent=1))
+        except RpcError as error:
+            print(f"error {error.code}: {error}", file=sys.stderr)
+            return 1
+        return 0
+    with Server(args.socket, Service(TreeCache(args.max_bytes, args.cache_dir))) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(args.socket)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Near-duplicate people: normalized names, phonetic blocking keys and
+fuzzy name scores (US23, US25).
+
+Comparing every person with every other is quadratic, so people are first
+put in blocks by a key that true duplicates share, by default the Soundex
+codes of the surname and first given name plus the birth year, and only
+people in the same block are scored against each other.
+"""
+import unicodedata
+from functools import lru_cache
+
+from .profiling import paused_collector
+
+NAME_THRESHOLD = 0.85  # names scoring at least this count as the same
+
+_SOUNDEX_CODES = {letter: digit for digit, letters in (('1', 'BFPV'), ('2', 'CGJKQSXZ'), ('3', 'DT'), ('4', 'L'),
+                                                        ('5', 'MN'), ('6', 'R'))
+                  for letter in letters}
+
+@lru_cache(maxsize=1 << 16)
+def normalize_name(name):
+    """(given names, surname) of a GEDCOM name such as 'John Paul /Smith/',
+    case-folded, without diacritics and with single spaces."""
+    if not name:
+        return ('', '')
+    if not name.isascii():
+        name = ''.join(char for char in unicodedata.normalize('NFKD', name) if not unicodedata.combining(char))
+    name = name.casefold()
+    given, _, rest = name.partition('/')
+    surname = rest.partition('/')[0]
+    return (' '.join(given.split()), ' '.join(surname.split()))
+
+@lru_cache(maxsize=1 << 16)
+def soundex(word):
+    """American Soundex code of word ('' for a word without letters)."""
+    letters = [char for char in word.upper() if 'A' <= char <= 'Z']
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'HW':  # H and W do not separate equal codes; vowels do
+            previous = digit
+    return code.ljust(4, '0')
+
+def full_name(person):
+    given, surname = normalize_name(person.name)
+    return f"{given} /{surname}/"
+
+def first_name(person):
+    return normalize_name(person.name)[0].partition(' ')[0]
+
+def blocking_key(person):
+    given, surname = normalize_name(person.name)
+    return (soundex(surname), soundex(given.partition(' ')[0]), person.birth.year if person.birth else None)
+
+def birthday_key(person):
+    # For matches that need the same birthday: the parsed date, so that
+    # '1 JAN 1900' and '01 JAN 1900' agree, or else the raw string.  Keying
+    # on the day rather than the year keeps blocks small however many
+    # names share a Soundex code
+    given, surname = normalize_name(person.name)
+    return (soundex(surname), soundex(given.partition(' ')[0]), person.birth or person.birthday)
+
+def first_name_key(person):
+    # For people already known to be related, such as siblings, who match
+    # with the same birthday
+    return (soundex(first_name(person)), person.birth or person.birthday)
+
+def similarity(a, b):
+    """Fuzzy score of two normalized names, from 0.0 to 1.0."""
+    if a == b:
+        return 1.0
+    from difflib import SequenceMatcher
+    return SequenceMatcher(None, a, b).ratio()
+
+def near_duplicates(people, key=blocking_key, name=full_name, threshold=NAME_THRESHOLD, match=None):
+    """Yield (person, earlier, score) for each person that duplicates an
+    earlier one of people: same key(), names scoring at least threshold
+    and, when given, match(person, earlier) true.  earlier is the first
+    such person."""
+    # Nearly every block holds one person, so a block is that person until
+    # a second one arrives.  The blocks are built first, noting each person
+    # who joined a block that already had someone in it; only they are
+    # then scored, in the order of people, and names are only worked out
+    # for them and whoever they are compared with.
+    blocks = {}
+    candidates = []
+    with paused_collector():
+        for person in people:
+            block_key = key(person)
+            block = blocks.get(block_key)
+            if block is None:
+                blocks[block_key] = person
+                continue
+            if type(block) is not list:
+                block = blocks[block_key] = [block]
+            candidates.append((person, block, len(block)))
+            block.append(person)
+    for person, block, earlier_count in candidates:
+        person_name = name(person)
+        for earlier in block[:earlier_count]:
+            if match is not None and not match(person, earlier):
+                continue
+            score = similarity(person_name, name(earlier))
+            if score >= threshold:
+                yield person, earlier, score
+                break
@@ -0,0 +1,170 @@
+"""Collected anomalies and incremental re-validation of edited records."""
+from .parser import iter_records
+from .rules import _collect, select_rules
+from .tree import families, individuals, relations
+
+class AnomalySet:
+    """What the selected checks printed, kept per rule and per record.
+
+    Each line is filed under the ID of the record the check was visiting
+    when it printed it (None for checks that scan the whole tree), so that
+    revalidate() can swap out just the entries of the records it re-checks.
+    """
+
+    def __init__(self, include=None, exclude=None, max_cost=None):
+        self.selection = (include, exclude, max_cost)
+        self.by_rule = {}  # story -> {record id: [lines]}
+
+    def lines(self):
+        for registered in select_rules(*self.selection):
+            for lines in self.by_rule.get(registered.story, {}).values():
+                yield from lines
+
+def collect_anomalies(include=None, exclude=None, max_cost=None):
+    """Run the selected checks like check_anomalies(), but return an
+    AnomalySet instead of printing, ready to be patched by revalidate()."""
+    anomalies = AnomalySet(include, exclude, max_cost)
+    for registered in select_rules(include, exclude, max_cost):
+        anomalies.by_rule[registered.story] = _collect(registered)
+    return anomalies
+
+def _record_state(record):
+    return tuple(getattr(record, name) for name in type(record).__slots__)
+
+def _pointers(kind, record):
+    if kind == 'INDI':
+        return record.child_families + record.spouse_families
+    return tuple(pointer for pointer in (record.husband, record.wife) if pointer) + tuple(record.children)
+
+def _link_keys(kind, record):
+    # The (Relations.LINKS name, ID) entries record asserts links in
+    if kind == 'INDI':
+        return ([('child_families', record.id), ('spouse_families', record.id)]
+                + [('family_children', family_id) for family_id in record.child_families]
+                + [('family_parents', family_id) for family_id in record.spouse_families])
+    return ([('family_parents', record.id), ('family_children', record.id)]
+            + [('spouse_families', parent_id) for parent_id in (record.husband, record.wife) if parent_id]
+            + [('child_families', child_id) for child_id in record.children])
+
+def _records_in_order(order):
+    if order is None:
+        for record in individuals.values():
+            yield 'INDI', record
+        for record in families.values():
+            yield 'FAM', record
+        return
+    for kind, record_id in order:
+        record = (individuals if kind == 'INDI' else families).get(record_id)
+        if record is not None:
+            yield kind, record
+
+def _add_neighbourhood(record_id, affected):
+    # Everything whose check result can depend on record_id: the record, the
+    # people and families it is linked to, the parents of those people (US32)
+    # and the marriages of their children and grandchildren, whose ancestry
+    # the kinship checks walk.
+    affected[record_id] = None
+    if record_id in families or record_id in relations.family_parents or record_id in relations.family_children:
+        people = relations.family_parents.get(record_id, ()) + relations.family_children.get(record_id, ())
+    else:
+        people = (record_id,)
+    for person_id in people:
+        affected[person_id] = None
+        for parent_id in relations.parents(person_id):
+            affected[parent_id] = None
+        for family_id in relations.child_families.get(person_id, ()) + relations.spouse_families.get(person_id, ()):
+            affected[family_id] = None
+        generation = [person_id]
+        for _ in range(2):
+            next_generation = []
+            for ancestor_id in generation:
+                for family_id in relations.spouse_families.get(ancestor_id, ()):
+                    next_generation.extend(relations.family_children.get(family_id, ()))
+            for descendant_id in next_generation:
+                for family_id in relations.spouse_families.get(descendant_id, ()):
+                    affected[family_id] = None
+            generation = next_generation
+
+def revalidate(anomalies, records=(), removed=(), order=None):
+    """Apply edited records to the loaded tree and re-check only what they
+    can affect, patching anomalies (from collect_anomalies) in place.
+
+    records holds ('INDI' | 'FAM', record) pairs that are new or replace the
+    record with the same ID; records identical to the loaded ones are
+    ignored.  removed holds IDs to delete.  When the edits change links,
+    the links they touch are rebuilt in file order: order lists the
+    ('INDI' | 'FAM', ID) pairs of the edited file, and defaults to the
+    loaded people and then the loaded families, the usual GEDCOM layout.
+    Returns the IDs re-checked.
+    """
+    # The last edit of a record wins
+    latest = {}
+    for kind, record in records:
+        latest[record.id] = (kind, record)
+    for record_id in removed:
+        if record_id in individuals:
+            latest[record_id] = ('INDI', None)
+        elif record_id in families:
+            latest[record_id] = ('FAM', None)
+    changes = []
+    for record_id, (kind, record) in latest.items():
+        old = (individuals if kind == 'INDI' else families).get(record_id)
+        if record is None or old is None or _record_state(old) != _record_state(record):
+            changes.append((kind, old, record))
+    if not changes:
+        return set()
+
+    affected = {}
+    for kind, old, new in changes:
+        if old is not None:
+            _add_neighbourhood(old.id, affected)
+    touched = set()
+    keys = {}
+    for kind, old, new in changes:
+        store = individuals if kind == 'INDI' else families
+        touched.add('individuals' if kind == 'INDI' else 'families')
+        if new is None:
+            del store[old.id]
+        else:
+            store[new.id] = new  # a replaced record keeps its place
+        if old is None or new is None or _pointers(kind, old) != _pointers(kind, new):
+            touched.add('relations')
+            for record in (old, new):
+                if record is not None:
+                    keys.update(dict.fromkeys(_link_keys(kind, record)))
+    if keys:
+        relations.relink(keys, _records_in_order(order))
+    for kind, old, new in changes:
+        _add_neighbourhood((new or old).id, affected)
+
+    for registered in select_rules(*anomalies.selection):
+        if not touched.intersection(registered.needs):
+            continue
+        if not registered.scoped:
+            anomalies.by_rule[registered.story] = _collect(registered)
+            continue
+        found = _collect(registered, scope=affected)
+        entries = anomalies.by_rule.setdefault(registered.story, {})
+        for record_id in affected:
+            if record_id in found:
+                entries[record_id] = found[record_id]
+            else:
+                entries.pop(record_id, None)
+    return set(affected)
+
+def revalidate_file(anomalies, file_path):
+    """Re-read an edited GEDCOM file and revalidate() the records that differ
+    from the loaded tree, including records that were deleted."""
+    seen = set()
+    changed = []
+    order = []
+    for kind, record in iter_records(file_path):
+        seen.add(record.id)
+        order.append((kind, record.id))
+        store = individuals if kind == 'INDI' else families
+        old = store.get(record.id)
+        if old is None or _record_state(old) != _record_state(record):
+            changed.append((kind, record))
+    removed = [record_id for record_id in individuals if record_id not in seen]
+    removed += [record_id for record_id in families if record_id not in seen]
+    return revalidate(anomalies, changed, removed, order)
@@ -0,0 +1,98 @@
+"""Random access to records of a GEDCOM file by ID."""
+import json
+import mmap
+import os
+import re
+from sys import intern
+
+from .parser import _records_from_lines
+
+_LEVEL0 = re.compile(rb'^[ \t]*0 (\S*)', re.MULTILINE)
+_RECORD_ID = re.compile(rb'@[IF]\d+@')
+INDEX_VERSION = 1
+
+class RecordIndex:
+    """Random access to the INDI and FAM records of a GEDCOM file by ID.
+
+    The file is memory-mapped and scanned once for level-0 lines, giving each
+    record ID the byte offset and length of its record; get() then parses
+    only that slice.  When index_path is given the offsets are saved there
+    as JSON and reused as long as the file's size and mtime are unchanged.
+    As with process_gedcom(), a later record with the same ID wins.
+    """
+
+    __slots__ = ('file_path', 'offsets', '_file', '_map')
+
+    def __init__(self, file_path, index_path=None):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        # mmap refuses empty files
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        signature = [INDEX_VERSION, stat.st_size, stat.st_mtime_ns]
+        self.offsets = self._load(index_path, signature) if index_path else None
+        if self.offsets is None:
+            self.offsets = self._scan()
+            if index_path:
+                with open(index_path, 'w') as index_file:
+                    json.dump({'signature': signature, 'offsets': self.offsets}, index_file)
+
+    def _scan(self):
+        offsets = {}
+        previous = None
+        for match in _LEVEL0.finditer(self._map):
+            if previous is not None:
+                offsets[previous[0]] = (previous[1], match.start() - previous[1])
+                previous = None
+            if _RECORD_ID.match(match.group(1)):
+                previous = (intern(match.group(1).decode()), match.start())
+        if previous is not None:
+            offsets[previous[0]] = (previous[1], len(self._map) - previous[1])
+        return offsets
+
+    @staticmethod
+    def _load(index_path, signature):
+        try:
+            with open(index_path) as index_file:
+                saved = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+        if saved.get('signature') != signature:
+            return None
+        return {intern(record_id): tuple(span) for record_id, span in saved['offsets'].items()}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, record_id):
+        return record_id in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def get(self, record_id):
+        """Parse and return the record with this ID as a (kind, record) pair,
+        or None if the file has no such record."""
+        span = self.offsets.get(record_id)
+        if span is None:
+            return None
+        offset, length = span
+        text = self._map[offset:offset + length].decode('utf-8', errors='replace')
+        return next(_records_from_lines(text.splitlines()), None)
+
+    def __getitem__(self, record_id):
+        found = self.get(record_id)
+        if found is None:
+            raise KeyError(record_id)
+        return found[1]
+
+    def close(self):
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,208 @@
+"""The relationship index shared by every rule, and kinship between people."""
+from .ancestry import Ancestry
+
+def _link(index, key, value):
+    # Tuples rather than lists: most people have one or two links and a
+    # tuple carries no spare capacity.
+    values = index.get(key, ())
+    if value not in values:
+        index[key] = values + (value,)
+
+def _unlink(index, key, value):
+    values = index.get(key, ())
+    if value in values:
+        values = tuple(v for v in values if v != value)
+        if values:
+            index[key] = values
+        else:
+            del index[key]
+
+class Relations:
+    """Multi-valued relationship index shared by every rule.
+
+    Links are taken from both ends (FAMC/FAMS on the person, HUSB/WIFE/CHIL on
+    the family) as records are read, so one build per file serves all rules
+    and a person with several FAMS or FAMC keeps all of them.  LINKS names
+    the four link dicts; the Ancestry of the links is kept with them until
+    they change (see ancestry()).
+    """
+    LINKS = ('child_families', 'spouse_families', 'family_parents', 'family_children')
+    __slots__ = LINKS + ('_ancestry',)
+
+    def __init__(self):
+        self.child_families = {}   # individual id -> (family ids it is a child in)
+        self.spouse_families = {}  # individual id -> (family ids it is a spouse in)
+        self.family_parents = {}   # family id -> (individual ids)
+        self.family_children = {}  # family id -> (individual ids)
+        self._ancestry = None
+
+    def __getstate__(self):
+        # The links only: the Ancestry is rebuilt on first use
+        return {name: getattr(self, name) for name in Relations.LINKS}
+
+    def __setstate__(self, state):
+        for name, links in state.items():
+            setattr(self, name, links)
+        self._ancestry = None
+
+    def clear(self):
+        self.child_families.clear()
+        self.spouse_families.clear()
+        self.family_parents.clear()
+        self.family_children.clear()
+        self._ancestry = None
+
+    def ancestry(self):
+        """The Ancestry of these links, built on first use and kept until
+        add(), remove() or clear() changes them."""
+        if self._ancestry is None:
+            self._ancestry = Ancestry(self)
+        return self._ancestry
+
+    def add(self, kind, record):
+        self._ancestry = None
+        if kind == 'INDI':
+            for family_id in record.child_families:
+                _link(self.child_families, record.id, family_id)
+                _link(self.family_children, family_id, record.id)
+            for family_id in record.spouse_families:
+                _link(self.spouse_families, record.id, family_id)
+                _link(self.family_parents, family_id, record.id)
+        else:
+            for parent_id in (record.husband, record.wife):
+                if parent_id:
+                    _link(self.spouse_families, parent_id, record.id)
+                    _link(self.family_parents, record.id, parent_id)
+            for child_id in record.children:
+                _link(self.child_families, child_id, record.id)
+                _link(self.family_children, record.id, child_id)
+
+    def remove(self, kind, record):
+        # Drops the links record asserts.  A link the other end also asserts
+        # has to be added back from that record; relink() does both and
+        # keeps the links in file order.
+        self._ancestry = None
+        if kind == 'INDI':
+            for family_id in record.child_families:
+                _unlink(self.child_families, record.id, family_id)
+                _unlink(self.family_children, family_id, record.id)
+            for family_id in record.spouse_families:
+                _unlink(self.spouse_families, record.id, family_id)
+                _unlink(self.family_parents, family_id, record.id)
+        else:
+            for parent_id in (record.husband, record.wife):
+                if parent_id:
+                    _unlink(self.spouse_families, parent_id, record.id)
+                    _unlink(self.family_parents, record.id, parent_id)
+            for child_id in record.children:
+                _unlink(self.child_families, child_id, record.id)
+                _unlink(self.family_children, record.id, child_id)
+
+    def relink(self, keys, records):
+        """Rebuild the links under keys, (name in LINKS, ID) pairs, from
+        records, every ('INDI' | 'FAM', record) pair of the tree in file
+        order.  The links come out in the order a fresh parse gives them,
+        the order they are first asserted in, which remove() and add()
+        alone would not keep."""
+        self._ancestry = None
+        people = {key for name, key in keys if name in ('child_families', 'spouse_families')}
+        family_ids = {key for name, key in keys if name in ('family_parents', 'family_children')}
+        rebuilt = Relations()
+        for kind, record in records:
+            if kind == 'INDI':
+                asserts = record.id in people or not family_ids.isdisjoint(record.child_families + record.spouse_families)
+            else:
+                asserts = (record.id in family_ids or record.husband in people or record.wife in people
+                           or not people.isdisjoint(record.children))
+            if asserts:
+                rebuilt.add(kind, record)
+        for name, key in keys:
+            links = getattr(rebuilt, name).get(key)
+            if links:
+                getattr(self, name)[key] = links
+            else:
+                getattr(self, name).pop(key, None)
+
+    def parents(self, individual_id):
+        parents = []
+        for family_id in self.child_families.get(individual_id, ()):
+            for parent_id in self.family_parents.get(family_id, ()):
+                if parent_id not in parents:
+                    parents.append(parent_id)
+        return parents
+
+    def siblings(self, individual_id):
+        siblings = set()
+        for family_id in self.child_families.get(individual_id, ()):
+            siblings.update(self.family_children.get(family_id, ()))
+        siblings.discard(individual_id)
+        return siblings
+
+    def ancestors(self, individual_id, max_depth=None):
+        # Breadth-first, so each ancestor gets its nearest generation
+        # distance; the person itself is included at distance 0.
+        depths = {individual_id: 0}
+        frontier = [individual_id]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for person_id in frontier:
+                for parent_id in self.parents(person_id):
+                    if parent_id not in depths:
+                        depths[parent_id] = depth
+                        next_frontier.append(parent_id)
+            frontier = next_frontier
+        return depths
+
+    def kinship(self, a, b, max_depth=None):
+        """Return (generations from a, generations from b) up to their closest
+        common ancestor, or None when none is found within max_depth.
+
+        (0, 2) means a is b's grandparent, (1, 1) siblings, (1, 2) a is b's
+        uncle or aunt and (2, 3) first cousins once removed; kinship_name()
+        turns the pair into words.
+        """
+        a_depths = self.ancestors(a, max_depth)
+        b_depths = self.ancestors(b, max_depth)
+        swapped = len(a_depths) > len(b_depths)
+        if swapped:
+            a_depths, b_depths = b_depths, a_depths
+        best = None
+        for ancestor_id, depth in a_depths.items():
+            other_depth = b_depths.get(ancestor_id)
+            if other_depth is not None and (best is None or depth + other_depth < best[0] + best[1]):
+                best = (depth, other_depth)
+        if best is not None and swapped:
+            best = (best[1], best[0])
+        return best
+
+ORDINALS = ["zeroth", "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth", "tenth"]
+
+def kinship_name(kinship):
+    # Describes what a is to b for a pair returned by Relations.kinship(a, b)
+    if kinship is None:
+        return "unrelated"
+    up, down = kinship
+    if up == 0 and down == 0:
+        return "self"
+    if up == 0:
+        return "parent" if down == 1 else "great-" * (down - 2) + "grandparent"
+    if down == 0:
+        return "child" if up == 1 else "great-" * (up - 2) + "grandchild"
+    if up == 1 and down == 1:
+        return "sibling"
+    if up == 1:
+        return "great-" * (down - 2) + "uncle/aunt"
+    if down == 1:
+        return "great-" * (up - 2) + "nephew/niece"
+    degree = min(up, down) - 1
+    name = (ORDINALS[degree] if degree < len(ORDINALS) else f"{degree}th") + " cousin"
+    removed = abs(up - down)
+    if removed == 1:
+        name += " once removed"
+    elif removed == 2:
+        name += " twice removed"
+    elif removed > 2:
+        name += f" {removed} times removed"
+    return name
@@ -0,0 +1,216 @@
+"""Reading GEDCOM files into records."""
+import io
+import os
+import re
+from sys import intern
+
+from . import profiling
+from .records import DATE_FIELDS, Family, Individual, parse_date, valid_tags
+from .tree import families, individuals, relations
+
+# A chunk of a parallel parse starts at a level-0 line, where
+# _records_from_lines() starts a fresh record anyway
+_LEVEL0 = re.compile(rb'^[ \t]*0 ', re.MULTILINE)
+MIN_CHUNK_BYTES = 1 << 20
+
+def iter_records(file_path, echo=False):
+    """Stream a GEDCOM file as ('INDI', record) / ('FAM', record) pairs.
+
+    Each record is yielded as soon as the next level-0 line closes it, so
+    callers can consume arbitrarily large files without keeping every record
+    in memory.  The per-line '-->' / '<--' trace is only printed when echo is
+    true.
+    """
+    with open(file_path, 'r') as file:
+        yield from _records_from_lines(file, echo)
+
+_KINDS = {'I': 'INDI', 'F': 'FAM'}
+
+def _record_kind(tag):
+    # 'INDI' for a tag starting with @I<digits>@, 'FAM' for @F<digits>@,
+    # else None; the same test as re.match(r'@[IF]\d+@'), without a regex
+    if tag[:1] != '@' or len(tag) < 4:
+        return None
+    kind = _KINDS.get(tag[1])
+    if kind is None:
+        return None
+    end = tag.find('@', 2)
+    return kind if end > 2 and tag[2:end].isdecimal() else None
+
+def _set(field, convert=None):
+    if convert is None:
+        def handle(record, arguments):
+            setattr(record, field, arguments)
+    else:
+        def handle(record, arguments):
+            setattr(record, field, convert(arguments))
+    return handle
+
+def _append(field):
+    def handle(record, arguments):
+        setattr(record, field, getattr(record, field) + (intern(arguments),))
+    return handle
+
+def _add_child(record, arguments):
+    record.children.append(intern(arguments))
+
+def _set_date(field):
+    parsed_field = DATE_FIELDS[field]
+    def handle(record, arguments):
+        setattr(record, field, arguments)
+        setattr(record, parsed_field, parse_date(arguments))
+    return handle
+
+_NO_TAGS = {}
+
+def _event(field):
+    return (None, {'DATE': (_set_date(field), _NO_TAGS)})
+
+# The tags understood below each level-0 record, as nested tables of
+# tag -> (handler(record, arguments) or None, table of the tags one level
+# further down).  Anything not in a table is skipped together with the
+# lines nested under it.
+RECORD_TAGS = {
+    'INDI': {
+        'NAME': (_set('name'), _NO_TAGS),
+        'SEX': (_set('sex', intern), _NO_TAGS),
+        'BIRT': _event('birthday'),
+        'DEAT': _event('death_date'),
+        'FAMC': (_append('child_families'), _NO_TAGS),
+        'FAMS': (_append('spouse_families'), _NO_TAGS),
+    },
+    'FAM': {
+        'HUSB': (_set('husband', intern), _NO_TAGS),
+        'WIFE': (_set('wife', intern), _NO_TAGS),
+        'CHIL': (_add_child, _NO_TAGS),
+        'MARR': _event('marriage_date'),
+        'DIV': _event('divorce_date'),
+    },
+}
+RECORD_TYPES = {'INDI': Individual, 'FAM': Family}
+_LEVELS = {str(level): level for level in range(100)}
+
+def _records_from_lines(lines, echo=False):
+    current_record = None
+    current_kind = None
+    # tables[n] holds the tags understood at level n under the lines last
+    # seen at levels 1 .. n-1; lines deeper than top are skipped
+    tables = [_NO_TAGS] * (len(_LEVELS) + 1)
+    top = 0
+
+    for line in lines:
+        parts = line.strip().split(' ', 2)
+        if len(parts) == 3:
+            level, tag, arguments = parts
+        else:
+            level = parts[0]
+            if not level:
+                continue
+            tag = parts[1] if len(parts) > 1 else ""
+            arguments = ""
+        if echo:
+            print(f"--> {line.strip()}")
+            is_valid = "Y" if tag in valid_tags else "N"
+            print(f"<-- {level}|{tag}|{is_valid} : {arguments}")
+
+        depth = _LEVELS.get(level)
+        if depth is None or depth > top:
+            continue
+        if depth == 0:
+            if current_record is not None:
+                yield current_kind, current_record
+            current_kind = _record_kind(tag)
+            if current_kind is None:
+                current_record = None
+                top = 0
+            else:
+                current_record = RECORD_TYPES[current_kind](intern(tag))
+                tables[1] = RECORD_TAGS[current_kind]
+                top = 1
+            continue
+        entry = tables[depth].get(tag)
+        top = depth + 1
+        if entry is None:
+            tables[top] = _NO_TAGS
+            continue
+        handle, tables[top] = entry
+        if handle is not None:
+            handle(current_record, arguments)
+
+    if current_record is not None:
+        yield current_kind, current_record
+
+def chunk_ranges(file_path, chunks, min_chunk_bytes=MIN_CHUNK_BYTES):
+    """Split file_path into at most chunks byte ranges (start, end) of
+    roughly equal size, each starting at a level-0 line.  Chunks smaller
+    than min_chunk_bytes are not worth a process and are merged."""
+    size = os.path.getsize(file_path)
+    chunks = max(1, min(chunks, size // max(1, min_chunk_bytes)))
+    starts = [0]
+    with open(file_path, 'rb') as file:
+        for chunk in range(1, chunks):
+            target = size * chunk // chunks
+            if target <= starts[-1]:
+                continue
+            # Level-0 lines are short and frequent; read a little past the
+            # target and widen the window for unusually long records
+            window = 1 << 16
+            while True:
+                file.seek(target - 1)
+                data = file.read(window + 1)
+                # data[0] is the byte before target, so ^ only matches at a
+                # real line start
+                match = _LEVEL0.search(data, 1)
+                if match or target + window >= size:
+                    break
+                window *= 4
+            if match:
+                starts.append(target - 1 + match.start())
+    starts = sorted(set(starts))
+    return list(zip(starts, starts[1:] + [size]))
+
+def _parse_chunk(task):
+    file_path, start, end = task
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    # Decoded and split into lines exactly as open(file_path, 'r') would
+    return list(_records_from_lines(io.TextIOWrapper(io.BytesIO(data))))
+
+def _parallel_records(file_path, workers, min_chunk_bytes=MIN_CHUNK_BYTES):
+    ranges = chunk_ranges(file_path, workers * 4, min_chunk_bytes)
+    if len(ranges) <= 1:
+        yield from iter_records(file_path)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(min(workers, len(ranges))) as pool:
+        # map() hands the chunks back in file order, so later records
+        # with the same ID still win and links are added in the same order
+        for records in pool.map(_parse_chunk, [(file_path, start, end) for start, end in ranges]):
+            for kind, record in records:
+                # Pickling loses interning across chunks; restore it
+                # for the IDs every record repeats
+                record.id = intern(record.id)
+                yield kind, record
+
+def process_gedcom(file_path, echo=False, workers=None, min_chunk_bytes=MIN_CHUNK_BYTES):
+    """Add the records of file_path to the loaded tree.
+
+    With workers > 1 (and no echo), the file is split at level-0 lines into
+    chunks of at least min_chunk_bytes that are parsed on a process pool and
+    merged in file order, giving the same tree as a sequential parse.
+    """
+    if workers and workers > 1 and not echo:
+        records = _parallel_records(file_path, workers, min_chunk_bytes)
+    else:
+        records = iter_records(file_path, echo)
+    with profiling.measure('parse'), profiling.paused_collector():
+        parsed = 0
+        for kind, record in records:
+            relations.add(kind, record)
+            if kind == 'INDI':
+                individuals[record.id] = record
+            else:
+                families[record.id] = record
+            parsed += 1
+        profiling.visited(parsed)
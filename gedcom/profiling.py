@@ -0,0 +1,235 @@
+"""Wall time, records visited, anomalies found and peak memory per phase
+and per rule.
+
+The parse, the report and every rule of check_anomalies() run inside
+measure(), which does nothing unless a hook is registered.  With a hook,
+each finished phase or rule is passed to it as a Measurement:
+
+    with Profile() as profile:
+        load_gedcom(path)
+        check_anomalies()
+    print(profile.text())
+
+Records visited are those handed out by in_shard() (or parsed, loaded or
+written, for the phases), anomalies are those a rule emitted (None for
+phases), and peak memory is the tracemalloc peak above the allocation level
+at the start, so it is only reported while tracemalloc is tracing (Profile
+starts it by default).
+"""
+import gc
+import sys
+import time
+
+_hooks = []
+_stack = []      # open measurements, innermost last
+_visited = 0     # records visited, a running count
+_found = 0       # anomalies emitted, a running count
+counting = False
+
+class Measurement:
+    __slots__ = ('name', 'kind', 'seconds', 'records', 'anomalies', 'peak_bytes', 'shard',
+                 '_start', '_visited', '_found', '_memory', '_peak')
+
+    def __init__(self, name, kind, seconds=0.0, records=0, anomalies=None, peak_bytes=None, shard=None):
+        self.name = name
+        self.kind = kind
+        self.seconds = seconds
+        self.records = records
+        self.anomalies = anomalies
+        self.peak_bytes = peak_bytes
+        self.shard = shard
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in Measurement.__slots__ if not name.startswith('_')}
+
+    def __repr__(self):
+        return f"Measurement({self.name!r}, {self.kind!r}, {self.seconds:.6f}s, {self.records} records, {self.anomalies} anomalies)"
+
+def add_hook(hook):
+    """Call hook(measurement) after every measured phase and rule."""
+    global counting
+    _hooks.append(hook)
+    counting = True
+
+def remove_hook(hook):
+    global counting
+    _hooks.remove(hook)
+    counting = bool(_hooks)
+
+def emit(measurement):
+    for hook in list(_hooks):
+        hook(measurement)
+
+def count(values):
+    """Pass values through, counting them as visited."""
+    global _visited
+    for value in values:
+        _visited += 1
+        yield value
+
+def visited(records):
+    global _visited
+    _visited += records
+
+def found():
+    """Count one anomaly; called by sinks.emit()."""
+    global _found
+    _found += 1
+
+def _fold_peak(tracemalloc):
+    # Fold the peak since the last reset into every open measurement, so
+    # that a nested measurement resetting it does not hide it from the outer
+    current, peak = tracemalloc.get_traced_memory()
+    for measurement in _stack:
+        measurement._peak = max(measurement._peak, peak)
+    tracemalloc.reset_peak()
+    return current
+
+class measure:
+    """Context manager measuring the code it wraps as one phase or rule."""
+
+    def __init__(self, name, kind='phase', shard=None):
+        self.measurement = Measurement(name, kind, shard=shard) if _hooks else None
+
+    def __enter__(self):
+        measurement = self.measurement
+        if measurement is None:
+            return None
+        tracemalloc = sys.modules.get('tracemalloc')
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            measurement._memory = measurement._peak = _fold_peak(tracemalloc)
+        else:
+            measurement._memory = None
+        _stack.append(measurement)
+        measurement._visited = _visited
+        measurement._found = _found
+        measurement._start = time.perf_counter()
+        return measurement
+
+    def __exit__(self, *exc_info):
+        measurement = self.measurement
+        if measurement is None:
+            return False
+        measurement.seconds = time.perf_counter() - measurement._start
+        measurement.records = _visited - measurement._visited
+        if measurement.kind == 'rule':
+            measurement.anomalies = _found - measurement._found
+        if measurement._memory is not None:
+            tracemalloc = sys.modules['tracemalloc']
+            if tracemalloc.is_tracing():
+                _fold_peak(tracemalloc)
+                measurement.peak_bytes = measurement._peak - measurement._memory
+        _stack.remove(measurement)
+        emit(measurement)
+        return False
+
+class recording:
+    """Route measurements into a list instead of the registered hooks, for
+    a worker process to send back to its parent."""
+
+    def __init__(self):
+        self.measurements = []
+
+    def __enter__(self):
+        global counting
+        self.hooks = _hooks[:]
+        _hooks[:] = [self.measurements.append]
+        counting = True
+        return self.measurements
+
+    def __exit__(self, *exc_info):
+        global counting
+        _hooks[:] = self.hooks
+        counting = bool(_hooks)
+        return False
+
+class paused_collector:
+    """Context manager turning the cyclic garbage collector off while it
+    runs, for code that allocates many long-lived objects and no garbage
+    cycles; otherwise each collection rescans everything built so far.
+    Never hold it across a yield: the caller would then run with the
+    collector off."""
+
+    def __enter__(self):
+        self.collecting = gc.isenabled()
+        gc.disable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.collecting:
+            gc.enable()
+        return False
+
+class Profile:
+    """Collects the measurements taken while it is active.
+
+    With memory=True tracemalloc is started for the duration (unless it
+    already runs), which slows Python code down by roughly half.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.measurements = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self.memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        add_hook(self.measurements.append)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self.measurements.append)
+        if self._started_tracing:
+            sys.modules['tracemalloc'].stop()
+            self._started_tracing = False
+        return False
+
+    def totals(self):
+        """One entry per phase or rule, in the order they first finished;
+        the shards of a rule run on a worker pool are added up (peak memory
+        is the largest shard's)."""
+        totals = {}
+        for measurement in self.measurements:
+            key = (measurement.kind, measurement.name)
+            total = totals.get(key)
+            if total is None:
+                totals[key] = Measurement(measurement.name, measurement.kind, measurement.seconds, measurement.records,
+                                          measurement.anomalies, measurement.peak_bytes)
+                continue
+            total.seconds += measurement.seconds
+            total.records += measurement.records
+            if measurement.anomalies is not None:
+                total.anomalies += measurement.anomalies
+            if measurement.peak_bytes is not None:
+                total.peak_bytes = max(total.peak_bytes or 0, measurement.peak_bytes)
+        return list(totals.values())
+
+    def as_dict(self):
+        return {'phases': [total.as_dict() for total in self.totals() if total.kind == 'phase'],
+                'rules': [total.as_dict() for total in self.totals() if total.kind == 'rule']}
+
+    def text(self):
+        """The totals as a table, slowest rule first."""
+        totals = self.totals()
+        rows = [total for total in totals if total.kind == 'phase']
+        rows += sorted((total for total in totals if total.kind == 'rule'), key=lambda total: -total.seconds)
+        width = max([len(row.name) for row in rows] + [5])
+        lines = [f"{'phase':<{width}}  {'seconds':>9}  {'records':>9}  {'anomalies':>9}  {'peak MiB':>9}"]
+        for row in rows:
+            anomalies = '-' if row.anomalies is None else row.anomalies
+            peak = '-' if row.peak_bytes is None else f"{row.peak_bytes / 2**20:.1f}"
+            lines.append(f"{row.name:<{width}}  {row.seconds:>9.4f}  {row.records:>9}  {anomalies:>9}  {peak:>9}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the report to path: text if it ends in .txt, JSON otherwise."""
+        with open(path, 'w') as output:
+            if path.endswith('.txt'):
+                output.write(self.text())
+            else:
+                import json
+                json.dump(self.as_dict(), output, indent=1)
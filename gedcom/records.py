@@ -0,0 +1,256 @@
+"""Record classes and date handling."""
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+
+valid_tags = frozenset(["INDI", "NAME", "SEX", "BIRT", "DEAT", "FAMC", "FAMS", "FAM", "MARR", "HUSB", "WIFE", "CHIL", "DIV", "DATE", "HEAD", "TRLR", "NOTE"])
+
+class Individual:
+    """One INDI record.
+
+    Fields missing from the file stay None.  Raw date strings are kept for
+    reporting next to their parsed values (see DATE_FIELDS).  With __slots__
+    the record itself costs 104 bytes on 64-bit CPython 3.11, against about
+    270 bytes for the equivalent dict; see the README for whole-tree sizing.
+    """
+    __slots__ = ('id', 'name', 'sex', 'birthday', 'birth', 'death_date', 'death', 'child_families', 'spouse_families')
+
+    def __init__(self, id):
+        self.id = id
+        self.name = None
+        self.sex = None
+        self.birthday = None
+        self.birth = None
+        self.death_date = None
+        self.death = None
+        self.child_families = ()
+        self.spouse_families = ()
+
+    def __repr__(self):
+        return f"Individual({self.id!r}, name={self.name!r})"
+
+class Family:
+    """One FAM record; see Individual for the conventions used."""
+    __slots__ = ('id', 'husband', 'wife', 'children', 'marriage_date', 'marriage', 'divorce_date', 'divorce')
+
+    def __init__(self, id):
+        self.id = id
+        self.husband = None
+        self.wife = None
+        self.children = []
+        self.marriage_date = None
+        self.marriage = None
+        self.divorce_date = None
+        self.divorce = None
+
+    def __repr__(self):
+        return f"Family({self.id!r}, husband={self.husband!r}, wife={self.wife!r})"
+
+MONTHS = {"JAN": 1, "FEB": 2, "MAR": 3, "APR": 4, "MAY": 5, "JUN": 6,
+          "JUL": 7, "AUG": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DEC": 12}
+
+# Raw date field -> field holding its parsed value, filled in at ingest.
+DATE_FIELDS = {'birthday': 'birth', 'death_date': 'death', 'marriage_date': 'marriage', 'divorce_date': 'divorce'}
+
+FIRST_DAY = date.min.toordinal()
+LAST_DAY = date.max.toordinal()
+ABOUT_YEARS = 1  # ABT, CAL and EST dates may be off by this many years either way
+
+class DateRange(tuple):
+    """A date as the range of days it may fall on: (earliest, latest), both
+    day ordinals as date.toordinal() counts them.  An exact date has
+    earliest == latest; "1850" covers the whole year, "BEF 1900" everything
+    up to the end of 1899.
+
+    Ranges compare by the day numbers alone, and the rules only report what
+    is definitely wrong: definitely_before() holds when every day of one
+    range is before every day of the other, possibly_before() when some day
+    is.  Sorting orders by earliest day.
+    """
+    __slots__ = ()
+
+    def __new__(cls, earliest, latest=None):
+        return tuple.__new__(cls, (earliest, earliest if latest is None else latest))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    earliest = property(itemgetter(0))
+    latest = property(itemgetter(1))
+
+    @property
+    def exact(self):
+        return self[0] == self[1]
+
+    @property
+    def year(self):
+        """Year of the earliest day."""
+        return date.fromordinal(self[0]).year
+
+    def definitely_before(self, other):
+        return self[1] < other[0]
+
+    def possibly_before(self, other):
+        return self[0] < other[1]
+
+    def before(self, other):
+        """True if self is definitely before other, False if it definitely is
+        not, None if that is unknown: the ranges overlap or other is None."""
+        if other is None:
+            return None
+        if self[1] < other[0]:
+            return True
+        if self[0] >= other[1]:
+            return False
+        return None
+
+    def plus_months(self, months):
+        """The range shifted as relativedelta(months=months) shifts a date."""
+        earliest = add_months(self[0], months)
+        return DateRange(earliest) if self[0] == self[1] else DateRange(earliest, add_months(self[1], months))
+
+    def __str__(self):
+        if self[0] == self[1]:
+            return date.fromordinal(self[0]).isoformat()
+        return f"{date.fromordinal(self[0]).isoformat()}/{date.fromordinal(self[1]).isoformat()}"
+
+    def __repr__(self):
+        return f"DateRange({str(self)!r})"
+
+def _month_length(year, month):
+    if month == 2:
+        return 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28
+    return 30 if month in (4, 6, 9, 11) else 31
+
+def add_months(day, months):
+    # Day ordinal plus whole months, keeping the day of the month or
+    # clamping it to the end of a shorter month, like relativedelta
+    value = date.fromordinal(day)
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    if year > 9999:
+        return LAST_DAY
+    if year < 1:
+        return FIRST_DAY
+    return date(year, month, min(value.day, _month_length(year, month))).toordinal()
+
+# Day numbers as written, and (ordinal of the first day, length) of each
+# valid month and year as written, so that most dates are parsed with a few
+# dict lookups rather than int() and date() calls
+_DAY_NUMBERS = {**{str(day): day for day in range(1, 32)}, **{f"{day:02}": day for day in range(1, 10)}}
+_month_spans = {}
+
+def _month_span(month, year):
+    number = MONTHS.get(month.upper())
+    if number is None or not year.isdigit() or len(year) != 4 or year == '0000':
+        return None
+    year_number = int(year)
+    span = _month_spans[month, year] = (date(year_number, number, 1).toordinal(), _month_length(year_number, number))
+    return span
+
+def _parse_day(parts):
+    # (earliest, latest) ordinals of "DD MON YYYY", "MON YYYY" or "YYYY"
+    # split into parts, or None
+    if len(parts) == 3:
+        day, month, year = parts
+        day = _DAY_NUMBERS.get(day)
+        if day is None:
+            return None
+    elif len(parts) == 2:
+        day = None
+        month, year = parts
+    elif len(parts) == 1:
+        year = parts[0]
+        if not year.isdigit() or len(year) != 4 or year == '0000':
+            return None
+        year = int(year)
+        return date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal()
+    else:
+        return None
+    span = _month_spans.get((month, year)) or _month_span(month, year)
+    if span is None:
+        return None
+    first, length = span
+    if day is None:
+        return first, first + length - 1
+    if day > length:
+        return None
+    day += first - 1
+    return day, day
+
+@lru_cache(maxsize=8192)
+def parse_date(date_str):
+    # Accepts "DD MON YYYY", "MON YYYY" and "YYYY", optionally qualified as
+    # ABT/CAL/EST (about), BEF, AFT, INT, BET ... AND ... or a FROM/TO period,
+    # without going through strptime, which is slow and depends on the
+    # process locale.
+    if not date_str:
+        return None
+    parts = date_str.split()
+    if len(parts) == 3 and parts[0] in _DAY_NUMBERS:
+        # Nearly every date is a plain "DD MON YYYY": _parse_day() inlined,
+        # and tuple.__new__ rather than DateRange.__new__
+        month, year = parts[1], parts[2]
+        span = _month_spans.get((month, year)) or _month_span(month, year)
+        day = _DAY_NUMBERS[parts[0]]
+        if span is None or day > span[1]:
+            return None
+        day += span[0] - 1
+        return tuple.__new__(DateRange, (day, day))
+    if not parts:
+        return None
+    keyword = parts[0].upper()
+    if keyword.isalpha() and keyword not in MONTHS:
+        parts = parts[1:]
+        if keyword in ('BET', 'FROM'):
+            stop = 'AND' if keyword == 'BET' else 'TO'
+            split = next((index for index, part in enumerate(parts) if part.upper() == stop), None)
+            start = _parse_day(parts if split is None else parts[:split])
+            if split is None:
+                # A period still going on: FROM with no TO
+                end = (LAST_DAY, LAST_DAY) if keyword == 'FROM' else None
+            else:
+                end = _parse_day(parts[split + 1:])
+            if start is None or end is None or start[0] > end[1]:
+                return None
+            return DateRange(start[0], end[1])
+        if keyword == 'INT':
+            # An interpreted date is followed by the phrase it came from
+            split = next((index for index, part in enumerate(parts) if part.startswith('(')), len(parts))
+            parts = parts[:split]
+        day = _parse_day(parts)
+        if day is None:
+            return None
+        if keyword in ('ABT', 'CAL', 'EST'):
+            return DateRange(add_months(day[0], -12 * ABOUT_YEARS), add_months(day[1], 12 * ABOUT_YEARS))
+        if keyword == 'BEF':
+            return DateRange(FIRST_DAY, day[0] - 1) if day[0] > FIRST_DAY else None
+        if keyword == 'AFT':
+            return DateRange(day[1] + 1, LAST_DAY) if day[1] < LAST_DAY else None
+        if keyword == 'TO':
+            return DateRange(FIRST_DAY, day[1])
+        if keyword == 'INT':
+            return tuple.__new__(DateRange, day)
+        return None
+    day = _parse_day(parts)
+    return None if day is None else tuple.__new__(DateRange, day)
+
+def calculate_age(birth_date):
+    # Whole years since birth_date as relativedelta counts them, taking the
+    # latest day a DateRange allows: the least age the person can be
+    if birth_date is None:
+        return None
+    today = date.today().toordinal()
+    born = birth_date.latest
+    age = date.fromordinal(today).year - date.fromordinal(born).year
+    if add_months(born, 12 * age) > today:
+        age -= 1
+    return age
+
+def months_between(earlier, later):
+    # Whole months from earlier to later, as relativedelta would count them
+    months = (later.year - earlier.year) * 12 + later.month - earlier.month
+    if later.day < earlier.day:
+        months -= 1
+    return months
@@ -0,0 +1,87 @@
+"""The individuals and families report, as tables, CSV or JSON Lines."""
+import os
+
+from . import profiling
+from .tree import families, individuals, relations
+
+def print_individuals_and_families(output_file):
+    with profiling.measure('report'):
+        profiling.visited(len(individuals) + len(families))
+        _print_tables(output_file)
+
+def _print_tables(output_file):
+    from prettytable import PrettyTable
+    sorted_individuals = sorted(individuals.values(), key=lambda x: x.id)
+    sorted_families = sorted(families.values(), key=lambda x: x.id)
+
+    with open(output_file, 'w') as f:
+        f.write("Individuals:\n")
+        ind_table = PrettyTable(["ID", "Name", "Gender", "Birthday", "Child", "Spouse"])
+        for ind in sorted_individuals:
+            child = ', '.join(relations.child_families.get(ind.id, ())) or None
+            spouse = ', '.join(relations.spouse_families.get(ind.id, ())) or None
+            ind_table.add_row([ind.id, ind.name, ind.sex, ind.birthday, child, spouse])
+        f.write(ind_table.get_string())
+        f.write("\n\nFamilies:\n")
+        fam_table = PrettyTable(["Family ID", "Husband ID", "Husband Name", "Wife ID", "Wife Name", "Children"])
+        for fam in sorted_families:
+            husband_name = individuals[fam.husband].name if fam.husband in individuals else "Unknown"
+            wife_name = individuals[fam.wife].name if fam.wife in individuals else "Unknown"
+            children_ids = ', '.join(relations.family_children.get(fam.id, ()))
+            fam_table.add_row([fam.id, fam.husband, husband_name, fam.wife, wife_name, children_ids])
+        f.write(fam_table.get_string())
+
+
+INDIVIDUAL_COLUMNS = ('id', 'name', 'sex', 'birthday', 'child_families', 'spouse_families')
+FAMILY_COLUMNS = ('id', 'husband', 'husband_name', 'wife', 'wife_name', 'children')
+EXPORT_FORMATS = ('table', 'csv', 'jsonl')
+
+def individual_rows():
+    """The rows of the Individuals table as tuples in INDIVIDUAL_COLUMNS
+    order, by ID, produced one at a time."""
+    for individual_id in sorted(individuals):
+        individual = individuals[individual_id]
+        yield (individual.id, individual.name, individual.sex, individual.birthday,
+               relations.child_families.get(individual.id, ()), relations.spouse_families.get(individual.id, ()))
+
+def family_rows():
+    """The rows of the Families table as tuples in FAMILY_COLUMNS order."""
+    for family_id in sorted(families):
+        family = families[family_id]
+        husband = individuals.get(family.husband)
+        wife = individuals.get(family.wife)
+        yield (family.id, family.husband, husband.name if husband else None, family.wife, wife.name if wife else None,
+               relations.family_children.get(family.id, ()))
+
+def _write_rows(output_file, columns, rows, format):
+    import csv
+    import json
+    with open(output_file, 'w', newline='') as f:
+        if format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                # Multi-valued cells are joined as in the table report
+                writer.writerow([', '.join(value) if isinstance(value, tuple) else value for value in row])
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row))))
+                f.write('\n')
+
+def export_individuals_and_families(output_file, format='csv'):
+    """Write the report as <stem>.individuals.<format> and
+    <stem>.families.<format>, streaming one row at a time instead of
+    building the tables first; 'table' writes the PrettyTable report to
+    output_file.  Returns the paths written."""
+    if format == 'table':
+        print_individuals_and_families(output_file)
+        return [output_file]
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {format!r}")
+    stem = os.path.splitext(output_file)[0]
+    paths = [f"{stem}.individuals.{format}", f"{stem}.families.{format}"]
+    with profiling.measure('report'):
+        profiling.visited(len(individuals) + len(families))
+        _write_rows(paths[0], INDIVIDUAL_COLUMNS, individual_rows(), format)
+        _write_rows(paths[1], FAMILY_COLUMNS, family_rows(), format)
+    return paths
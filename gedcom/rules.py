@@ -0,0 +1,609 @@
+"""The US rules, their registry and the anomaly check runner."""
+import io
+import sys
+from contextlib import nullcontext, redirect_stdout
+from datetime import date
+from itertools import islice
+from operator import itemgetter
+
+from . import profiling
+from .duplicates import birthday_key, first_name, first_name_key, near_duplicates
+from .records import calculate_age, months_between
+from .sinks import ListSink, emit, sending_to
+from .tree import _install_tree, families, individuals, relations, sorted_child_births
+
+# Checks iterate over in_shard(individuals) / in_shard(families) rather than
+# .values() so that a worker process can be told to look at one contiguous
+# slice of the records, and revalidate() can restrict a check to the records
+# an edit may have affected.  Normally the shard is the whole dict.
+_shard = (0, 1)
+_scope = None
+# ID of the record being checked, tracked while collecting anomalies
+_current_record = None
+_tracking = False
+
+def in_shard(records):
+    if _scope is not None:
+        values = (records[record_id] for record_id in _scope if record_id in records)
+    else:
+        index, count = _shard
+        if count == 1:
+            values = iter(records.values())
+        else:
+            size = -(-len(records) // count)
+            values = islice(records.values(), index * size, (index + 1) * size)
+    if profiling.counting:
+        values = profiling.count(values)
+    return _track(values) if _tracking else values
+
+def _every(values):
+    # For the rules that look at every record whatever the shard: values,
+    # counted as visited while profiling
+    return profiling.count(values) if profiling.counting else values
+
+def _track(values):
+    global _current_record
+    for record in values:
+        _current_record = record.id
+        yield record
+
+COSTS = ('cheap', 'moderate', 'expensive')
+
+class Rule:
+    """A registered anomaly check.
+
+    needs names the data the check reads ('individuals', 'families' and/or
+    'relations') and cost is one of COSTS.  A scoped check looks at each
+    record it gets from in_shard() on its own, plus that record's relatives,
+    so revalidate() can re-run it on just the records around an edit.
+    shardable says whether its output stays in order when it is handed one
+    slice of the records at a time on a worker pool.
+    """
+    __slots__ = ('story', 'check', 'needs', 'cost', 'shardable', 'scoped')
+
+    def __init__(self, story, check, needs, cost, shardable, scoped):
+        self.story = story
+        self.check = check
+        self.needs = needs
+        self.cost = cost
+        self.shardable = shardable
+        self.scoped = scoped
+
+    def __repr__(self):
+        return f"Rule({self.story!r}, {self.check.__name__}, cost={self.cost!r})"
+
+# Every registered check, in the order they run
+RULES = []
+
+def rule(story, needs, cost='cheap', shardable=True, scoped=None):
+    if cost not in COSTS:
+        raise ValueError(f"unknown cost class {cost!r}")
+    if scoped is None:
+        scoped = shardable
+    def register(check):
+        RULES.append(Rule(story, check, needs, cost, shardable, scoped))
+        return check
+    return register
+
+def select_rules(include=None, exclude=None, max_cost=None):
+    """Return the registered rules to run, in run order.
+
+    include and exclude hold user story IDs ('US19') or cost classes
+    ('expensive'); with no include every rule is a candidate.  max_cost drops
+    rules dearer than the given cost class.
+    """
+    def matcher(names):
+        wanted_stories = set()
+        wanted_costs = set()
+        for name in names:
+            name = name.strip()
+            if name.upper() in stories:
+                wanted_stories.add(name.upper())
+            elif name.lower() in COSTS:
+                wanted_costs.add(name.lower())
+            else:
+                raise ValueError(f"unknown rule or cost class {name!r}")
+        return lambda r: r.story in wanted_stories or r.cost in wanted_costs
+
+    stories = set(r.story for r in RULES)
+    selected = RULES
+    if include:
+        wanted = matcher(include)
+        selected = [r for r in selected if wanted(r)]
+    if exclude:
+        unwanted = matcher(exclude)
+        selected = [r for r in selected if not unwanted(r)]
+    if max_cost is not None:
+        if max_cost not in COSTS:
+            raise ValueError(f"unknown cost class {max_cost!r}")
+        limit = COSTS.index(max_cost)
+        selected = [r for r in selected if COSTS.index(r.cost) <= limit]
+    return list(selected)
+
+# US04 check marriage before divorce
+@rule('US04', needs=('individuals', 'families', 'relations'), cost='cheap')
+def check_marriage_before_divorce():
+    for individual in in_shard(individuals):
+        for family_id in relations.spouse_families.get(individual.id, ()):
+            family = families.get(family_id)
+            if family is None:
+                continue
+            marriage_date = family.marriage
+            divorce_date = family.divorce
+            if marriage_date and divorce_date and divorce_date.definitely_before(marriage_date):
+                emit('US04', (individual.id,), f"ERROR: Individual: US04 {individual.name}: ({individual.id}): {marriage_date}: has marriage date after divorce date.")
+    return None
+# US05 check marriage before death
+@rule('US05', needs=('individuals', 'families', 'relations'), cost='cheap')
+def check_marriage_before_death():
+    for individual in in_shard(individuals):
+        death_date = individual.death
+        if not death_date:
+            continue
+        for family_id in relations.spouse_families.get(individual.id, ()):
+            family = families.get(family_id)
+            if family is None:
+                continue
+            marriage_date = family.marriage
+            if marriage_date and death_date.definitely_before(marriage_date):
+                emit('US05', (individual.id,), f"ERROR: Individual: US05 {individual.name}: ({individual.id}): {marriage_date}: has marriage date after death date.")
+# US03 check birth before death
+@rule('US03', needs=('individuals',), cost='cheap')
+def check_birth_before_death():
+    for individual in in_shard(individuals):
+        birth_date = individual.birth
+        death_date = individual.death
+        if birth_date and death_date and not birth_date.possibly_before(death_date):
+            emit('US03', (individual.id,), f"ERROR: Individual: US06 {individual.name}: ({individual.id}): Birth date {individual.birthday} is not earlier than death date {individual.death_date}.")
+
+# US01 check all dates are before current date
+@rule('US01', needs=('individuals', 'families'), cost='cheap', shardable=False, scoped=True)
+def check_dates_before_current():
+    today = date.today().toordinal()
+    for individual in in_shard(individuals):
+        birth_date = individual.birth
+        if individual.death_date is None: continue
+        death_date = individual.death
+        if birth_date and birth_date.earliest > today:
+            emit('US01', (individual.id,), f"ERROR: Individual: US07 {individual.name}: ({individual.id}): Birth date {individual.birthday} is after the current date.")
+        if death_date and death_date.earliest > today:
+            emit('US01', (individual.id,), f"ERROR: Individual: US07 {individual.name}: ({individual.id}): Death date {individual.death_date} is after the current date.")
+    for family in in_shard(families):
+        if family.marriage_date is None: continue
+        marriage_date = family.marriage
+        if family.divorce_date is None: continue
+        divorce_date = family.divorce
+        if marriage_date and marriage_date.earliest > today:
+            emit('US01', (family.id,), f"ERROR: Family: US07 {family.id}: Marriage date {family.marriage_date} is after the current date.")
+        if divorce_date and divorce_date.earliest > today:
+            emit('US01', (family.id,), f"ERROR: Family: US07 {family.id}: Divorce date {family.divorce_date} is after the current date.")
+
+#US06 Divorce before death
+@rule('US06', needs=('families', 'individuals'), cost='cheap')
+def check_divorce_before_death():
+    for family in in_shard(families):
+        divorce_date = family.divorce
+        if not divorce_date:
+            continue
+
+        husband_id = family.husband
+        wife_id = family.wife
+
+        husband_death_date = getattr(individuals.get(husband_id), 'death', None)
+        wife_death_date = getattr(individuals.get(wife_id), 'death', None)
+
+        if husband_death_date:
+            if husband_death_date.definitely_before(divorce_date):
+                emit('US06', (family.id,), f"Error: Family: {family.id}: has divorce date after husband's death date.")
+
+        if wife_death_date:
+            if wife_death_date.definitely_before(divorce_date):
+                emit('US06', (family.id,), f"Error: Family: {family.id}: has divorce date after wife's death date.")
+
+#US08 Birth before marriage of parents
+@rule('US08', needs=('families', 'individuals', 'relations'), cost='cheap')
+def check_birth_before_parents_marriage():
+   # errors = []
+    for family in in_shard(families):
+        marriage_date = family.marriage
+        if not marriage_date:
+            continue
+
+        for child_id in relations.family_children.get(family.id, ()):
+            if child_id in individuals:
+                birth_date = individuals[child_id].birth
+                if birth_date and birth_date.definitely_before(marriage_date):
+                    #errors.append
+                    emit('US08', (child_id,), f"ERROR: US08: Individual: {individuals[child_id].name} ({child_id}): has birth date before the marriage of parents.")
+    return None
+#US02 Birth before marriage of individual
+@rule('US02', needs=('individuals', 'families', 'relations'), cost='cheap')
+def check_birth_before_marriage():
+    for individual in in_shard(individuals):
+        birth_date = individual.birth
+        if not birth_date:
+            continue
+        for family_id in relations.spouse_families.get(individual.id, ()):
+            marriage_date = getattr(families.get(family_id), 'marriage', None)
+            if marriage_date and marriage_date.definitely_before(birth_date):
+                emit('US02', (individual.id,), f"ERROR: US02: Individual: {individual.name} ({individual.id}): has birth date after marriage date.")
+
+#US09: Birth before death of parents
+@rule('US09', needs=('families', 'individuals', 'relations'), cost='cheap')
+def check_birth_before_death_parents():
+    # child should be born before the death of the mother and before 9 months after the death of the father
+    for family in in_shard(families):
+        mother_id = family.wife
+        father_id = family.husband
+        for child_id in relations.family_children.get(family.id, ()):
+            if child_id in individuals:
+                child = individuals[child_id]
+                birth_date = child.birth # child birthday
+                if not birth_date:
+                    continue
+                death_date_mother = getattr(individuals.get(mother_id), 'death', None)
+                death_date_father = getattr(individuals.get(father_id), 'death', None)
+                if death_date_mother:
+                    if death_date_mother.definitely_before(birth_date):
+                        emit('US09', (child_id,), f"ERROR: US09: Individual: {individuals[child_id].name} ({child_id}): has birth date after death date of mother.")
+                if death_date_father:
+                    nine_months_after = death_date_father.plus_months(9)
+                    if nine_months_after.definitely_before(birth_date):
+                        emit('US09', (child_id,), f"ERROR: US09: Individual: {individuals[child_id].name} ({child_id}): has birth date after 9 months after death date of father.")
+# US10
+@rule('US10', needs=('families', 'individuals'), cost='moderate')
+def check_marriage_after_14():
+    # Marriage should be after 14 years of age
+    for family in in_shard(families):
+        marriage_date = family.marriage
+        if not marriage_date:
+            continue
+        mother_id = family.wife
+        father_id = family.husband
+        if mother_id in individuals and father_id in individuals:
+            birth_date_mother = individuals[mother_id].birth
+            birth_date_father = individuals[father_id].birth
+            if birth_date_mother:
+                mother_comparison = birth_date_mother.plus_months(14 * 12)
+                if marriage_date.definitely_before(mother_comparison):
+                    emit('US10', (family.id,), f"ERROR: US10: Family: {family.id}: has marriage date before 14 years of age of mother.")
+            if birth_date_father:
+                father_comparison = birth_date_father.plus_months(14 * 12)
+                if marriage_date.definitely_before(father_comparison):
+                    emit('US10', (family.id,), f"ERROR: US10: Family: {family.id}: has marriage date before 14 years of age of father.")
+#US12
+@rule('US12', needs=('families', 'individuals', 'relations'), cost='moderate')
+def mother_too_old():
+    # Mother should be less than 60 years old compared to her children
+    for family in in_shard(families):
+        mother_id = family.wife
+        for child_id in relations.family_children.get(family.id, ()):
+            if child_id in individuals:
+                child = individuals[child_id]
+                birth_date = child.birth
+                if not birth_date:
+                    continue
+                if mother_id in individuals:
+                    mother = individuals[mother_id]
+                    mother_birth_date = mother.birth
+                    # Over 60 means 61 full years back from the child's
+                    # birth still reaches the mother's
+                    if mother_birth_date and not birth_date.plus_months(-61 * 12).possibly_before(mother_birth_date):
+                            emit('US12', (family.id,), f"ERROR: US12: Family: {family.id}: has mother too old.")
+#US13
+@rule('US13', needs=('families', 'individuals', 'relations'), cost='moderate')
+def siblings_spacing():
+    # Sibling births should be more than 8 months apart, unless they are
+    # twins born less than 2 days apart.
+    for family in in_shard(families):
+        if _siblings_too_close(sorted_child_births(family.id)):
+            emit('US13', (family.id,), f"ERROR: US13: Family: {family.id}: has sibling too young.")
+
+def _siblings_too_close(births):
+    # Whether two of births, sorted by earliest day, are definitely 2 days
+    # to 8 months apart.  One sweep with two pointers: walking the births
+    # by earliest day, a second pointer walks them by latest day and takes
+    # in those that ended at least 2 days before the current one starts.
+    # Of those, the one that started last is the closest possible pair.
+    ending = sorted(births, key=itemgetter(1))
+    taken = 0
+    closest = None
+    for later in births:
+        while taken < len(ending) and ending[taken].latest <= later.earliest - 2:
+            if closest is None or ending[taken].earliest > closest:
+                closest = ending[taken].earliest
+            taken += 1
+        if closest is not None and months_between(date.fromordinal(closest), date.fromordinal(later.latest)) < 8:
+            return True
+    return False
+#US14
+@rule('US14', needs=('families', 'individuals', 'relations'), cost='moderate')
+def multiple_births():
+    # No more than 5 siblings should have the same birthday
+    for family in in_shard(families):
+        births = [birth for birth in sorted_child_births(family.id) if birth.exact]
+        same_day = 1
+        for earlier, later in zip(births, births[1:]):
+            same_day = same_day + 1 if later == earlier else 1
+            if same_day > 5:
+                emit('US14', (family.id,), f"ERROR: US14: Family: {family.id}: has multiple births.")
+                break
+# US15 Check if there are more than 15 siblings
+@rule('US15', needs=('families', 'relations'), cost='cheap')
+def check_siblings_count():
+    for family in in_shard(families):
+        if len(relations.family_children.get(family.id, ())) > 15:
+            emit('US15', (family.id,), f"ERROR: Family: US15 {family.id} has more than 15 siblings.")
+# US 16
+@rule('US16', needs=('families', 'individuals'), cost='cheap')
+def check_wife_last_name():
+    for family in in_shard(families):
+        husband_id = family.husband
+        wife_id = family.wife
+        if husband_id in individuals and wife_id in individuals:
+            husband_name = individuals[husband_id].name
+            wife_name = individuals[wife_id].name
+            if not husband_name or not husband_name.strip() or not wife_name or not wife_name.strip():
+                continue
+            husband_last_name = husband_name.split('/')[-1].strip() if '/' in husband_name else husband_name.split()[-1]
+            wife_last_name = wife_name.split('/')[-1].strip() if '/' in wife_name else wife_name.split()[-1]
+            if husband_last_name != wife_last_name:
+                emit('US16', (family.id, husband_id, wife_id), f"ERROR: US16: Family: {family.id}: Wife {wife_name} ({wife_id}) does not have the same last name as husband {husband_name} ({husband_id}).")
+
+#US17
+@rule('US17', needs=('families', 'individuals', 'relations'), cost='moderate', shardable=False, scoped=False)
+def check_marriage_to_descendants():
+    # Ancestors at any depth, so an edit far up the tree can change the
+    # result for a family anywhere below it: not scoped.  Families are
+    # reported before people, so the shards of a pool would interleave
+    # the two: not shardable either.  The Ancestry is built once per
+    # version of the links, not once per run
+    ancestry = relations.ancestry()
+    for family in in_shard(families):
+        husband_id = family.husband
+        wife_id = family.wife
+        if ancestry.is_ancestor(wife_id, husband_id):
+            emit('US17', (family.id,), f"ERROR: US17: Family: {family.id}: has marriage to descendants.")
+        if ancestry.is_ancestor(husband_id, wife_id):
+            emit('US17', (family.id,), f"ERROR: US17: Family: {family.id}: has marriage to descendants.")
+    for individual in in_shard(individuals):
+        if ancestry.in_cycle(individual.id):
+            emit('US17', (individual.id,), f"ERROR: US17: Individual: {individual.name} ({individual.id}): is their own ancestor.")
+# US18
+@rule('US18', needs=('families', 'relations'), cost='moderate')
+def check_siblings_marriage():
+    for family in in_shard(families):
+        husband_id = family.husband
+        wife_id = family.wife
+        if husband_id and wife_id and wife_id in relations.siblings(husband_id):
+            emit('US18', (family.id,), f"ERROR: US18: Family: {family.id}: has siblings married.")
+
+@rule('US19', needs=('families', 'individuals', 'relations'), cost='expensive')
+def check_no_first_cousin_marriages():
+    for family in in_shard(families):
+        husband = family.husband
+        wife = family.wife
+        if not husband or not wife:
+            continue
+        if relations.kinship(husband, wife, max_depth=2) == (2, 2):
+            husband_name = individuals[husband].name if husband in individuals else "Unknown"
+            wife_name = individuals[wife].name if wife in individuals else "Unknown"
+            emit('US19', (family.id, husband, wife), f"ERROR: Family: {family.id}: First cousins {husband_name} ({husband}) and {wife_name} ({wife}) are married.")
+@rule('US20', needs=('families', 'individuals', 'relations'), cost='expensive')
+def check_no_aunt_uncle_niece_nephew_marriages():
+    for family in in_shard(families):
+        husband = family.husband
+        wife = family.wife
+        if not husband or not wife:
+            continue
+        kinship = relations.kinship(husband, wife, max_depth=2)
+        if kinship == (1, 2):
+            elder, younger = husband, wife
+        elif kinship == (2, 1):
+            elder, younger = wife, husband
+        else:
+            continue
+        elder_name = individuals[elder].name if elder in individuals else "Unknown"
+        younger_name = individuals[younger].name if younger in individuals else "Unknown"
+        emit('US20', (family.id, elder, younger), f"ERROR: Family: {family.id}: Aunt/Uncle {elder_name} ({elder}) and Niece/Nephew {younger_name} ({younger}) are married.")
+@rule('US21', needs=('families', 'individuals'), cost='cheap')
+def check_parents_gender():
+    for family in in_shard(families):
+        husband_id = family.husband
+        wife_id = family.wife
+
+        # Check if the husband's gender is male
+        if husband_id in individuals:
+            husband_gender = individuals[husband_id].sex
+            if husband_gender != 'M':
+                husband_name = individuals[husband_id].name if husband_id in individuals else "Unknown"
+                emit('US21', (family.id, husband_id), f"ERROR: Family: {family.id}: Husband {husband_name} ({husband_id}) is not male.")
+
+        # Check if the wife's gender is female
+        if wife_id in individuals:
+            wife_gender = individuals[wife_id].sex
+            if wife_gender != 'F':
+                wife_name = individuals[wife_id].name if wife_id in individuals else "Unknown"
+                emit('US21', (family.id, wife_id), f"ERROR: Family: {family.id}: Wife {wife_name} ({wife_id}) is not female.")
+@rule('US22', needs=('individuals',), cost='cheap', shardable=False)
+def check_unique_individual_ids():
+    seen_ids = set()
+    for individual_id in _every(individuals):
+        if individual_id in seen_ids:
+            emit('US22', (individual_id,), f"ERROR: Individual {individual_id}: Duplicate individual ID found.")
+        else:
+            seen_ids.add(individual_id)
+@rule('US23', needs=('individuals',), cost='moderate', shardable=False)
+def check_unique_names_and_birthdays():
+    # Same birthday and the same name up to case, diacritics and spelling
+    # slips; only people with the same sounding names and birthday are
+    # compared
+    for individual, earlier, _ in near_duplicates(_every(individuals.values()), key=birthday_key):
+        name = individual.name
+        birthday = individual.birthday
+        emit('US23', (individual.id, earlier.id), f"ERROR: Individual {individual.id}: Duplicate name '{name}' and birthday '{birthday}' found.")
+@rule('US24', needs=('families',), cost='cheap', shardable=False)
+def check_unique_spouses():
+    seen_spouses = set()
+    for family in _every(families.values()):
+        husband_id = family.husband
+        wife_id = family.wife
+        if (husband_id, wife_id) in seen_spouses or (wife_id, husband_id) in seen_spouses:
+            emit('US24', (family.id, husband_id, wife_id), f"ERROR: Family {family.id}: Duplicate spouses found with husband {husband_id} and wife {wife_id}.")
+        else:
+            seen_spouses.add((husband_id, wife_id))
+#US 25
+@rule('US25', needs=('families', 'individuals', 'relations'), cost='moderate')
+def check_unique_first_names():
+    # No two children of a family with the same first name and birthday
+    for family in in_shard(families):
+        child_ids = relations.family_children.get(family.id, ())
+        if len(child_ids) < 2:
+            continue
+        children = [individuals[child_id] for child_id in child_ids if child_id in individuals and first_name(individuals[child_id])]
+        for child, earlier, _ in near_duplicates(children, key=first_name_key, name=first_name):
+            first = child.name.split()[0]
+            emit('US25', (child.id, earlier.id, family.id), f"ERROR: US25: Individual {child.id}: Duplicate first name '{first}' found in family {family.id}.")
+#US 26
+@rule('US26', needs=('individuals', 'relations'), cost='cheap')
+def check_membership():
+    # indivudal must be a spouse or a child
+    for individual in in_shard(individuals):
+        if individual.id not in relations.spouse_families and individual.id not in relations.child_families:
+            emit('US26', (individual.id,), f"ERROR: US26: Individual {individual.id}: Must be a spouse or child.")
+
+@rule('US31', needs=('individuals', 'relations'), cost='moderate')
+def list_single_over_30():
+    for individual in in_shard(individuals):
+        if individual.id not in relations.spouse_families:  # Single person
+            birth_date = individual.birth
+            if birth_date:
+                age = calculate_age(birth_date)
+                if age and age > 30:
+                    emit('US31', (individual.id,), f"Single person over 30: {individual.name} ({individual.id}), Age: {age}", severity='info')
+@rule('US32', needs=('individuals', 'families', 'relations'), cost='moderate')
+def list_mothers_with_multiple_births():
+    # Collect children per mother
+    for mother in in_shard(individuals):
+        mother_id = mother.id
+        children = []
+        for family_id in relations.spouse_families.get(mother_id, ()):
+            if families.get(family_id) is not None and families[family_id].wife == mother_id:
+                for child_id in relations.family_children.get(family_id, ()):
+                    if child_id not in children:
+                        children.append(child_id)
+
+        # Print mothers with more than one child
+        if len(children) > 1:
+            emit('US32', (mother_id,), f"Mother with multiple births: {mother.name} ({mother_id}), Children: {', '.join(children)}", severity='info')
+
+ENGINES = ('python', 'numpy')
+
+def _run_check(task):
+    global _shard
+    story, shard_index, shard_count, profile, collect = task
+    _shard = (shard_index, shard_count)
+    buffer = io.StringIO()
+    try:
+        with profiling.recording() if profile else nullcontext() as measurements, \
+                sending_to(ListSink() if collect else None) as sink, redirect_stdout(buffer):
+            for registered in RULES:
+                if registered.story == story:
+                    with profiling.measure(story, 'rule', shard_index if shard_count > 1 else None):
+                        registered.check()
+    finally:
+        _shard = (0, 1)
+    return sink.anomalies if collect else buffer.getvalue(), measurements
+
+def check_anomalies(workers=None, include=None, exclude=None, max_cost=None, engine='python', sink=None):
+    """Run the selected checks (see select_rules), printing what they find,
+    or adding it to sink (see sinks) as Anomaly records.
+
+    With workers > 1 the checks run on a process pool; checks that allow it
+    are split into one contiguous shard of records per worker.  Output is
+    collected per task and printed in task order, so it matches a sequential
+    run line for line.  With engine='numpy' the rules in VECTOR_RULES run
+    on DateColumns in this process instead, with the same output.  Each
+    rule (each shard, on a pool) is measured for profiling.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    selected = select_rules(include, exclude, max_cost)
+    with sending_to(sink):
+        _check_selected(selected, workers, engine, sink)
+    if sink is not None:
+        sink.flush()
+
+def _check_selected(selected, workers, engine, sink):
+    columns = None
+    if engine == 'numpy':
+        from .vector import VECTOR_RULES, DateColumns
+        if any(registered.story in VECTOR_RULES for registered in selected):
+            columns = DateColumns()
+
+    def vectorized(registered):
+        return columns is not None and registered.story in VECTOR_RULES
+
+    if not workers or workers <= 1:
+        for registered in selected:
+            with profiling.measure(registered.story, 'rule'):
+                if vectorized(registered):
+                    VECTOR_RULES[registered.story](columns)
+                else:
+                    registered.check()
+        return
+    tasks = []
+    for registered in selected:
+        if vectorized(registered):
+            tasks.append(registered.story)
+            continue
+        shard_count = workers if registered.shardable else 1
+        for shard_index in range(shard_count):
+            tasks.append((registered.story, shard_index, shard_count, profiling.counting, sink is not None))
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # Forked workers inherit the parsed tree without pickling it
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_install_tree, initargs=((individuals, families, relations),))
+    with pool:
+        pending = [task if isinstance(task, str) else pool.submit(_run_check, task) for task in tasks]
+        for task in pending:
+            if isinstance(task, str):
+                buffer = io.StringIO()
+                with redirect_stdout(buffer), profiling.measure(task, 'rule'):
+                    VECTOR_RULES[task](columns)
+                sys.stdout.write(buffer.getvalue())
+                continue
+            output, measurements = task.result()
+            if sink is None:
+                sys.stdout.write(output)
+            else:
+                for anomaly in output:
+                    sink.add(anomaly)
+            for measurement in measurements or ():
+                profiling.emit(measurement)
+
+class _RecordSink:
+    # Files each message under the record being checked when it was emitted
+    def __init__(self, entries):
+        self.entries = entries
+
+    def add(self, anomaly):
+        self.entries.setdefault(_current_record, []).append(anomaly.message)
+
+def _collect(registered, scope=None):
+    global _scope, _current_record, _tracking
+    entries = {}
+    _scope = scope
+    _current_record = None
+    _tracking = True
+    try:
+        with sending_to(_RecordSink(entries)):
+            registered.check()
+    finally:
+        _scope = None
+        _current_record = None
+        _tracking = False
+    return entries
@@ -0,0 +1,114 @@
+"""Structured anomalies and the sinks the rules report them to.
+
+Rules call emit() with the user story, the IDs of the records involved and
+the message.  Without a sink (the default) the message is printed, exactly
+as the rules always did; check_anomalies(sink=...) sends the anomalies to a
+sink instead, which formats them and writes them out in batches.
+"""
+from . import profiling
+
+SEVERITIES = ('error', 'info')
+ANOMALY_FORMATS = ('text', 'jsonl')
+
+class Anomaly:
+    """One finding of a rule: severity is 'error' for ERROR lines and 'info'
+    for the listings (US31, US32); message is the line a rule prints."""
+    __slots__ = ('rule', 'severity', 'records', 'message')
+
+    def __init__(self, rule, severity, records, message):
+        self.rule = rule
+        self.severity = severity
+        self.records = records
+        self.message = message
+
+    def as_dict(self):
+        return {'rule': self.rule, 'severity': self.severity, 'records': list(self.records), 'message': self.message}
+
+    def __repr__(self):
+        return f"Anomaly({self.rule!r}, {self.severity!r}, {self.records!r}, {self.message!r})"
+
+class ListSink:
+    """Keeps the anomalies in a list."""
+
+    def __init__(self):
+        self.anomalies = []
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+
+    def add(self, anomaly):
+        self.anomalies.append(anomaly)
+        self.counts[anomaly.severity] += 1
+
+    def flush(self):
+        pass
+
+class _BufferedSink:
+    # Formats anomalies as they arrive and writes them batch lines at a time
+    def __init__(self, stream, batch=4096):
+        self.stream = stream
+        self.batch = batch
+        self.pending = []
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+
+    def add(self, anomaly):
+        self.pending.append(self.format(anomaly))
+        self.counts[anomaly.severity] += 1
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.stream.write(''.join(self.pending))
+            self.pending.clear()
+
+class TextSink(_BufferedSink):
+    """Writes each anomaly's message as a line of stream, as the rules
+    print them."""
+
+    @staticmethod
+    def format(anomaly):
+        return anomaly.message + '\n'
+
+class JsonlSink(_BufferedSink):
+    """Writes each anomaly to stream as a JSON object on its own line."""
+
+    def __init__(self, stream, batch=4096):
+        super().__init__(stream, batch)
+        import json
+        self.dumps = json.dumps
+
+    def format(self, anomaly):
+        return self.dumps(anomaly.as_dict()) + '\n'
+
+def open_sink(stream, format='text', batch=4096):
+    """A TextSink or JsonlSink (see ANOMALY_FORMATS) writing to stream."""
+    if format not in ANOMALY_FORMATS:
+        raise ValueError(f"unknown anomaly format {format!r}")
+    return (TextSink if format == 'text' else JsonlSink)(stream, batch)
+
+_sink = None
+
+class sending_to:
+    """Route what the rules emit to sink for the duration (None prints)."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        global _sink
+        self.previous = _sink
+        _sink = self.sink
+        return self.sink
+
+    def __exit__(self, *exc_info):
+        global _sink
+        _sink = self.previous
+        return False
+
+def emit(rule, records, message, severity='error'):
+    """Report one anomaly found by rule about the records with these IDs."""
+    if profiling.counting:
+        profiling.found()
+    if _sink is None:
+        print(message)
+    else:
+        _sink.add(Anomaly(rule, severity, records, message))
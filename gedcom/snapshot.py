@@ -0,0 +1,78 @@
+"""Parsed-tree snapshots cached on disk by content digest."""
+import mmap
+import os
+
+from . import profiling
+from .kinship import Relations
+from .parser import process_gedcom
+from .tree import _install_tree, families, individuals, relations
+
+PARSER_VERSION = 3  # bump whenever parsing changes what ends up in a record
+SNAPSHOT_MAGIC = b'GEDSNAP1'
+DEFAULT_CACHE_BYTES = 2 << 30
+
+def file_digest(file_path):
+    """BLAKE2b hex digest of the file's contents."""
+    import hashlib
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    return digest.hexdigest()
+
+def load_gedcom(file_path, cache_dir=None, max_cache_bytes=DEFAULT_CACHE_BYTES, workers=None):
+    """Replace the loaded tree with the contents of file_path.
+
+    With a cache_dir, the parsed tree (records, parsed dates and relation
+    index) is pickled there under the file's content digest and
+    PARSER_VERSION, and later loads of an unchanged file unpickle it instead
+    of parsing.  Both are checked again against the snapshot header on load.
+    The directory is kept under max_cache_bytes by dropping the least
+    recently used snapshots.  workers is passed on to process_gedcom() for a
+    parallel parse.  Returns True on a cache hit.
+    """
+    if cache_dir is None:
+        _install_tree(({}, {}, Relations()))
+        process_gedcom(file_path, workers=workers)
+        return False
+    import pickle
+    digest = file_digest(file_path)
+    header = SNAPSHOT_MAGIC + f"{PARSER_VERSION}:{digest}\n".encode()
+    snapshot_path = os.path.join(cache_dir, f"{digest}-v{PARSER_VERSION}.snap")
+    try:
+        with open(snapshot_path, 'rb') as snapshot:
+            if snapshot.read(len(header)) == header:
+                with profiling.measure('snapshot'):
+                    with profiling.paused_collector():
+                        _install_tree(pickle.load(snapshot))
+                    profiling.visited(len(individuals) + len(families))
+                os.utime(snapshot_path)  # mark as recently used
+                return True
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass  # missing or unreadable snapshot: parse again and rewrite it
+    _install_tree(({}, {}, Relations()))
+    process_gedcom(file_path, workers=workers)
+    os.makedirs(cache_dir, exist_ok=True)
+    partial_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(partial_path, 'wb') as snapshot:
+        snapshot.write(header)
+        pickle.dump((individuals, families, relations), snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial_path, snapshot_path)
+    _evict_snapshots(cache_dir, max_cache_bytes)
+    return False
+
+def _evict_snapshots(cache_dir, max_cache_bytes):
+    snapshots = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.snap') and entry.is_file():
+            stat = entry.stat()
+            snapshots.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    snapshots.sort()
+    total = sum(size for _, size, _ in snapshots)
+    # Always keep the newest snapshot, even if it alone is over the limit
+    for _, size, path in snapshots[:-1]:
+        if total <= max_cache_bytes:
+            break
+        os.remove(path)
+        total -= size
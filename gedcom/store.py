@@ -0,0 +1,161 @@
+"""A SQLite-backed tree for files larger than memory."""
+import sqlite3
+from datetime import date
+
+from .parser import iter_records
+from .rules import select_rules
+from .sinks import emit, sending_to
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS individuals (
+    seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, name TEXT, sex TEXT,
+    birthday TEXT, birth TEXT, birth_latest TEXT, death_date TEXT, death TEXT, death_latest TEXT);
+CREATE TABLE IF NOT EXISTS families (
+    seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, husband TEXT, wife TEXT,
+    marriage_date TEXT, marriage TEXT, marriage_latest TEXT, divorce_date TEXT, divorce TEXT, divorce_latest TEXT);
+CREATE TABLE IF NOT EXISTS links (
+    seq INTEGER PRIMARY KEY, individual TEXT NOT NULL, family TEXT NOT NULL, role TEXT NOT NULL,
+    UNIQUE (individual, role, family));
+CREATE INDEX IF NOT EXISTS links_by_family ON links (family, role);
+CREATE INDEX IF NOT EXISTS individuals_by_birth ON individuals (birth);
+CREATE INDEX IF NOT EXISTS individuals_by_death ON individuals (death);
+CREATE INDEX IF NOT EXISTS families_by_marriage ON families (marriage);
+CREATE INDEX IF NOT EXISTS families_by_spouses ON families (
+    min(ifnull(husband, ''), ifnull(wife, '')), max(ifnull(husband, ''), ifnull(wife, '')));
+"""
+
+def _sql_date(value):
+    # A DateRange as its earliest and latest days, 'YYYY-MM-DD' text that
+    # sorts like the days and that SQLite's date functions read
+    if value is None:
+        return None, None
+    return date.fromordinal(value.earliest).isoformat(), date.fromordinal(value.latest).isoformat()
+
+def _sql_str(column):
+    # What str() of the DateRange in column prints
+    return f"CASE WHEN {column} = {column}_latest THEN {column} ELSE {column} || '/' || {column}_latest END"
+
+def _sql_plus_14_years(column):
+    # relativedelta clamps 29 Feb to 28 Feb; SQLite's '+14 years' rolls over
+    # to 1 Mar, so take whichever is earlier, the end of that month or the
+    # rolled-over date.
+    return (f"min(date({column}, '+14 years'), "
+            f"date({column}, 'start of month', '+14 years', '+1 month', '-1 day'))")
+
+class SqliteStore:
+    """A GEDCOM tree kept in a SQLite database instead of the in-memory dicts.
+
+    load() streams records from iter_records() into the database in batches,
+    so memory stays bounded by batch_size whatever the size of the file.
+    Records keep the in-memory semantics: a repeated ID overwrites the
+    earlier record but keeps its place in file order, and family links are
+    taken from both ends as in Relations.  check_anomalies() runs the rules
+    in SQL_RULES as indexed queries, printing what the in-memory rules print.
+    """
+
+    def __init__(self, db_path):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(STORE_SCHEMA)
+
+    def load(self, file_path, batch_size=10000):
+        people, groups, links = [], [], []
+        for kind, record in iter_records(file_path):
+            if kind == 'INDI':
+                people.append((record.id, record.name, record.sex, record.birthday, *_sql_date(record.birth),
+                               record.death_date, *_sql_date(record.death)))
+                links += [(record.id, family_id, 'C') for family_id in record.child_families]
+                links += [(record.id, family_id, 'S') for family_id in record.spouse_families]
+            else:
+                groups.append((record.id, record.husband, record.wife, record.marriage_date, *_sql_date(record.marriage),
+                               record.divorce_date, *_sql_date(record.divorce)))
+                links += [(parent_id, record.id, 'S') for parent_id in (record.husband, record.wife) if parent_id]
+                links += [(child_id, record.id, 'C') for child_id in record.children]
+            if len(people) + len(groups) >= batch_size:
+                self._write(people, groups, links)
+                people, groups, links = [], [], []
+        self._write(people, groups, links)
+
+    def _write(self, people, groups, links):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO individuals (id, name, sex, birthday, birth, birth_latest, death_date, death, death_latest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, sex = excluded.sex, birthday = excluded.birthday, "
+                "birth = excluded.birth, birth_latest = excluded.birth_latest, death_date = excluded.death_date, "
+                "death = excluded.death, death_latest = excluded.death_latest", people)
+            self.connection.executemany(
+                "INSERT INTO families (id, husband, wife, marriage_date, marriage, marriage_latest, divorce_date, divorce, divorce_latest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET husband = excluded.husband, wife = excluded.wife, "
+                "marriage_date = excluded.marriage_date, marriage = excluded.marriage, marriage_latest = excluded.marriage_latest, "
+                "divorce_date = excluded.divorce_date, divorce = excluded.divorce, divorce_latest = excluded.divorce_latest", groups)
+            self.connection.executemany("INSERT OR IGNORE INTO links (individual, family, role) VALUES (?, ?, ?)", links)
+
+    def check_anomalies(self, include=None, exclude=None, max_cost=None, sink=None):
+        """Run the selected rules that have a SQL version, in registry order,
+        printing or adding to sink what they find.  Returns the stories that
+        were run; the others need the in-memory tree."""
+        ran = []
+        with sending_to(sink):
+            for registered in select_rules(include, exclude, max_cost):
+                if registered.story in SQL_RULES:
+                    SQL_RULES[registered.story](self.connection)
+                    ran.append(registered.story)
+        if sink is not None:
+            sink.flush()
+        return ran
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _sql_marriage_before_death(connection):
+    rows = connection.execute(
+        f"SELECT i.name, i.id, {_sql_str('f.marriage')} FROM individuals i "
+        "JOIN links l ON l.individual = i.id AND l.role = 'S' "
+        "JOIN families f ON f.id = l.family "
+        "WHERE i.death IS NOT NULL AND f.marriage > i.death_latest ORDER BY i.seq, l.seq")
+    for name, individual_id, marriage in rows:
+        emit('US05', (individual_id,), f"ERROR: Individual: US05 {name}: ({individual_id}): {marriage}: has marriage date after death date.")
+
+def _sql_birth_before_marriage(connection):
+    rows = connection.execute(
+        "SELECT i.name, i.id FROM individuals i "
+        "JOIN links l ON l.individual = i.id AND l.role = 'S' "
+        "JOIN families f ON f.id = l.family "
+        "WHERE f.marriage IS NOT NULL AND i.birth > f.marriage_latest ORDER BY i.seq, l.seq")
+    for name, individual_id in rows:
+        emit('US02', (individual_id,), f"ERROR: US02: Individual: {name} ({individual_id}): has birth date after marriage date.")
+
+def _sql_marriage_after_14(connection):
+    rows = connection.execute(
+        f"SELECT f.id, f.marriage_latest < {_sql_plus_14_years('w.birth')}, f.marriage_latest < {_sql_plus_14_years('h.birth')} "
+        "FROM families f JOIN individuals w ON w.id = f.wife JOIN individuals h ON h.id = f.husband "
+        "WHERE f.marriage IS NOT NULL ORDER BY f.seq")
+    for family_id, mother_too_young, father_too_young in rows:
+        if mother_too_young:
+            emit('US10', (family_id,), f"ERROR: US10: Family: {family_id}: has marriage date before 14 years of age of mother.")
+        if father_too_young:
+            emit('US10', (family_id,), f"ERROR: US10: Family: {family_id}: has marriage date before 14 years of age of father.")
+
+def _sql_unique_spouses(connection):
+    rows = connection.execute(
+        "SELECT id, husband, wife FROM ("
+        "  SELECT seq, id, husband, wife, row_number() OVER ("
+        "    PARTITION BY min(ifnull(husband, ''), ifnull(wife, '')), max(ifnull(husband, ''), ifnull(wife, ''))"
+        "    ORDER BY seq) AS nth FROM families"
+        ") WHERE nth > 1 ORDER BY seq")
+    for family_id, husband_id, wife_id in rows:
+        emit('US24', (family_id, husband_id, wife_id), f"ERROR: Family {family_id}: Duplicate spouses found with husband {husband_id} and wife {wife_id}.")
+
+SQL_RULES = {
+    'US05': _sql_marriage_before_death,
+    'US02': _sql_birth_before_marriage,
+    'US10': _sql_marriage_after_14,
+    'US24': _sql_unique_spouses,
+}
@@ -0,0 +1,30 @@
+"""The loaded tree.
+
+individuals, families and relations are shared by every module and are
+only ever changed in place (clear/update), never rebound, so that
+`from .tree import individuals` stays valid.
+"""
+from .kinship import Relations
+
+individuals = {}
+families = {}
+
+relations = Relations()
+
+def sorted_child_births(family_id):
+    births = []
+    for child_id in relations.family_children.get(family_id, ()):
+        child = individuals.get(child_id)
+        if child is not None and child.birth:
+            births.append(child.birth)
+    births.sort()
+    return births
+
+def _install_tree(tree):
+    individuals.clear()
+    individuals.update(tree[0])
+    families.clear()
+    families.update(tree[1])
+    relations.clear()
+    for name in Relations.LINKS:
+        getattr(relations, name).update(getattr(tree[2], name))
@@ -0,0 +1,162 @@
+"""NumPy versions of the date rules US01-US10 (needs NumPy)."""
+from datetime import datetime
+
+from .sinks import emit
+from .tree import families, individuals, relations
+
+UNIX_EPOCH_ORDINAL = 719163  # datetime(1970, 1, 1).toordinal()
+
+class DateColumns:
+    """The loaded tree's dates as NumPy datetime64[D] columns, for the
+    vectorized versions of the date rules in VECTOR_RULES.  Each date field
+    is two columns, the earliest day of its DateRange (birth) and the
+    latest (birth_latest).
+
+    People and families are numbered in dict order.  Person columns carry
+    one extra NaT entry at the end, so that -1 (a spouse pointer to a
+    missing person) reads as "no date".  Spouse and child links are kept
+    as parallel index arrays in the order the Python rules walk them, so
+    np.flatnonzero() of a mask lists the findings in the order the Python
+    rule would print them.
+    """
+
+    def __init__(self):
+        import numpy as np
+        self.np = np
+        self.people = list(individuals.values())
+        self.groups = list(families.values())
+        person_index = {person.id: index for index, person in enumerate(self.people)}
+        family_index = {family.id: index for index, family in enumerate(self.groups)}
+
+        def dates(values):
+            # Building from the day ordinals is much faster than letting
+            # NumPy convert date objects one by one
+            nat = np.iinfo(np.int64).min
+            earliest = np.fromiter((value[0] - UNIX_EPOCH_ORDINAL if value else nat for value in values), dtype=np.int64)
+            latest = np.fromiter((value[1] - UNIX_EPOCH_ORDINAL if value else nat for value in values), dtype=np.int64)
+            return earliest.view('datetime64[D]'), latest.view('datetime64[D]')
+
+        self.birth, self.birth_latest = dates([person.birth for person in self.people] + [None])
+        self.death, self.death_latest = dates([person.death for person in self.people] + [None])
+        self.has_death_date = np.array([person.death_date is not None for person in self.people], dtype=bool)
+        self.marriage, self.marriage_latest = dates([family.marriage for family in self.groups])
+        self.divorce, self.divorce_latest = dates([family.divorce for family in self.groups])
+        self.has_marriage_date = np.array([family.marriage_date is not None for family in self.groups], dtype=bool)
+        self.has_divorce_date = np.array([family.divorce_date is not None for family in self.groups], dtype=bool)
+        self.husband = np.array([person_index.get(family.husband, -1) for family in self.groups], dtype=np.intp)
+        self.wife = np.array([person_index.get(family.wife, -1) for family in self.groups], dtype=np.intp)
+
+        spouse_links = [(index, family_index[family_id])
+                        for index, person in enumerate(self.people)
+                        for family_id in relations.spouse_families.get(person.id, ())
+                        if family_id in family_index]
+        child_links = [(index, person_index[child_id])
+                       for index, family in enumerate(self.groups)
+                       for child_id in relations.family_children.get(family.id, ())
+                       if child_id in person_index]
+        self.spouse_person, self.spouse_family = np.array(spouse_links, dtype=np.intp).reshape(-1, 2).T
+        self.child_family, self.child_person = np.array(child_links, dtype=np.intp).reshape(-1, 2).T
+
+    def add_months(self, days, months):
+        """days + relativedelta(months=months): the day of the month is kept,
+        or clamped to the end of a shorter month."""
+        np = self.np
+        month = days.astype('datetime64[M]')
+        target = month + months
+        month_length = (target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')
+        day = np.minimum(days - month.astype('datetime64[D]'), month_length - 1)
+        return target.astype('datetime64[D]') + day
+
+def _vector_dates_before_current(columns):
+    today = columns.np.datetime64(datetime.now().date(), 'D')
+    people = columns.people
+    dated = columns.has_death_date
+    for index in columns.np.flatnonzero(dated & ((columns.birth[:-1] > today) | (columns.death[:-1] > today))):
+        individual = people[index]
+        if columns.birth[index] > today:
+            emit('US01', (individual.id,), f"ERROR: Individual: US07 {individual.name}: ({individual.id}): Birth date {individual.birthday} is after the current date.")
+        if columns.death[index] > today:
+            emit('US01', (individual.id,), f"ERROR: Individual: US07 {individual.name}: ({individual.id}): Death date {individual.death_date} is after the current date.")
+    dated = columns.has_marriage_date & columns.has_divorce_date
+    for index in columns.np.flatnonzero(dated & ((columns.marriage > today) | (columns.divorce > today))):
+        family = columns.groups[index]
+        if columns.marriage[index] > today:
+            emit('US01', (family.id,), f"ERROR: Family: US07 {family.id}: Marriage date {family.marriage_date} is after the current date.")
+        if columns.divorce[index] > today:
+            emit('US01', (family.id,), f"ERROR: Family: US07 {family.id}: Divorce date {family.divorce_date} is after the current date.")
+
+def _vector_birth_before_marriage(columns):
+    late = columns.birth[columns.spouse_person] > columns.marriage_latest[columns.spouse_family]
+    for index in columns.spouse_person[late]:
+        individual = columns.people[index]
+        emit('US02', (individual.id,), f"ERROR: US02: Individual: {individual.name} ({individual.id}): has birth date after marriage date.")
+
+def _vector_birth_before_death(columns):
+    for index in columns.np.flatnonzero(columns.birth[:-1] >= columns.death_latest[:-1]):
+        individual = columns.people[index]
+        emit('US03', (individual.id,), f"ERROR: Individual: US06 {individual.name}: ({individual.id}): Birth date {individual.birthday} is not earlier than death date {individual.death_date}.")
+
+def _vector_marriage_before_divorce(columns):
+    linked = columns.spouse_family
+    late = columns.marriage[linked] > columns.divorce_latest[linked]
+    for person, family in zip(columns.spouse_person[late], linked[late]):
+        individual = columns.people[person]
+        emit('US04', (individual.id,), f"ERROR: Individual: US04 {individual.name}: ({individual.id}): {columns.groups[family].marriage}: has marriage date after divorce date.")
+
+def _vector_marriage_before_death(columns):
+    linked = columns.spouse_family
+    late = columns.marriage[linked] > columns.death_latest[columns.spouse_person]
+    for person, family in zip(columns.spouse_person[late], linked[late]):
+        individual = columns.people[person]
+        emit('US05', (individual.id,), f"ERROR: Individual: US05 {individual.name}: ({individual.id}): {columns.groups[family].marriage}: has marriage date after death date.")
+
+def _vector_divorce_before_death(columns):
+    after_husband = columns.divorce > columns.death_latest[columns.husband]
+    after_wife = columns.divorce > columns.death_latest[columns.wife]
+    for index in columns.np.flatnonzero(after_husband | after_wife):
+        family = columns.groups[index]
+        if after_husband[index]:
+            emit('US06', (family.id,), f"Error: Family: {family.id}: has divorce date after husband's death date.")
+        if after_wife[index]:
+            emit('US06', (family.id,), f"Error: Family: {family.id}: has divorce date after wife's death date.")
+
+def _vector_birth_before_parents_marriage(columns):
+    early = columns.birth_latest[columns.child_person] < columns.marriage[columns.child_family]
+    for index in columns.child_person[early]:
+        child = columns.people[index]
+        emit('US08', (child.id,), f"ERROR: US08: Individual: {child.name} ({child.id}): has birth date before the marriage of parents.")
+
+def _vector_birth_before_death_parents(columns):
+    family = columns.child_family
+    birth = columns.birth[columns.child_person]
+    after_mother = birth > columns.death_latest[columns.wife[family]]
+    after_father = birth > columns.add_months(columns.death_latest[columns.husband[family]], 9)
+    for link in columns.np.flatnonzero(after_mother | after_father):
+        child = columns.people[columns.child_person[link]]
+        if after_mother[link]:
+            emit('US09', (child.id,), f"ERROR: US09: Individual: {child.name} ({child.id}): has birth date after death date of mother.")
+        if after_father[link]:
+            emit('US09', (child.id,), f"ERROR: US09: Individual: {child.name} ({child.id}): has birth date after 9 months after death date of father.")
+
+def _vector_marriage_after_14(columns):
+    both = (columns.husband >= 0) & (columns.wife >= 0)
+    mother_young = both & (columns.marriage_latest < columns.add_months(columns.birth[columns.wife], 14 * 12))
+    father_young = both & (columns.marriage_latest < columns.add_months(columns.birth[columns.husband], 14 * 12))
+    for index in columns.np.flatnonzero(mother_young | father_young):
+        family = columns.groups[index]
+        if mother_young[index]:
+            emit('US10', (family.id,), f"ERROR: US10: Family: {family.id}: has marriage date before 14 years of age of mother.")
+        if father_young[index]:
+            emit('US10', (family.id,), f"ERROR: US10: Family: {family.id}: has marriage date before 14 years of age of father.")
+
+VECTOR_RULES = {
+    'US01': _vector_dates_before_current,
+    'US02': _vector_birth_before_marriage,
+    'US03': _vector_birth_before_death,
+    'US04': _vector_marriage_before_divorce,
+    'US05': _vector_marriage_before_death,
+    'US06': _vector_divorce_before_death,
+    'US08': _vector_birth_before_parents_marriage,
+    'US09': _vector_birth_before_death_parents,
+    'US10': _vector_marriage_after_14,
+}
@@ -1,8 +1,22 @@
 
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
+import benchmark
+import gedcom
+from gedcom import daemon
+
 # Mock data and functions for testing
 def parse_date(date_str):
     return datetime.strptime(date_str, '%Y-%m-%d') if date_str else None
@@ -773,5 +787,1030 @@ class TestAnomalies(unittest.TestCase):
 
     # Additional test methods for other functions...
 
+SAMPLE_GEDCOM = """0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME John /Doe/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 1980
+1 FAMS @F1@
+0 @I2@ INDI
+1 NAME Jane /Doe/
+1 SEX F
+1 BIRT
+2 DATE 2 FEB 1985
+1 DEAT Y
+2 DATE 2 FEB 2020
+1 FAMS @F1@
+0 @I3@ INDI
+1 NAME Child /Doe/
+1 SEX M
+1 BIRT
+2 DATE 3 MAR 2010
+1 FAMC @F1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+1 MARR
+2 DATE 1 JAN 2005
+0 TRLR
+"""
+
+def write_sample(text=SAMPLE_GEDCOM):
+    handle, path = tempfile.mkstemp(suffix='.ged')
+    with os.fdopen(handle, 'w') as f:
+        f.write(text)
+    return path
+
+
+class TestIterRecords(unittest.TestCase):
+    def setUp(self):
+        self.path = write_sample()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_yields_records_in_file_order(self):
+        records = list(gedcom.iter_records(self.path))
+        self.assertEqual([kind for kind, _ in records], ['INDI', 'INDI', 'INDI', 'FAM'])
+        self.assertEqual(records[1][1].death_date, '2 FEB 2020')
+        self.assertEqual(records[3][1].children, ['@I3@'])
+        self.assertEqual(records[3][1].marriage_date, '1 JAN 2005')
+
+    def test_record_is_yielded_before_file_is_consumed(self):
+        stream = gedcom.iter_records(self.path)
+        kind, record = next(stream)
+        self.assertEqual((kind, record.id), ('INDI', '@I1@'))
+        stream.close()
+
+    def test_quiet_by_default(self):
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            list(gedcom.iter_records(self.path))
+        self.assertEqual(buffer.getvalue(), '')
+        with redirect_stdout(buffer):
+            list(gedcom.iter_records(self.path, echo=True))
+        self.assertIn('--> 0 @I1@ INDI', buffer.getvalue())
+        self.assertIn('<-- 0|@I1@|N : INDI', buffer.getvalue())
+
+
+def day(year, month, day):
+    return datetime(year, month, day).toordinal()
+
+
+class TestParseDate(unittest.TestCase):
+    def test_supported_formats(self):
+        self.assertEqual(gedcom.parse_date('17 APR 2001'), gedcom.DateRange(day(2001, 4, 17)))
+        self.assertEqual(gedcom.parse_date('APR 2001'), gedcom.DateRange(day(2001, 4, 1), day(2001, 4, 30)))
+        self.assertEqual(gedcom.parse_date('2001'), gedcom.DateRange(day(2001, 1, 1), day(2001, 12, 31)))
+        self.assertEqual(gedcom.parse_date('6 dec 1961'), gedcom.DateRange(day(1961, 12, 6)))
+        self.assertEqual(gedcom.parse_date('06 Dec 1961'), gedcom.parse_date('6 DEC 1961'))
+        self.assertEqual(gedcom.parse_date('29 FEB 2000'), gedcom.DateRange(day(2000, 2, 29)))
+
+    def test_qualifiers_and_ranges(self):
+        self.assertEqual(gedcom.parse_date('ABT 1850'), gedcom.DateRange(day(1849, 1, 1), day(1851, 12, 31)))
+        self.assertEqual(gedcom.parse_date('BEF 1900'), gedcom.DateRange(1, day(1899, 12, 31)))
+        self.assertEqual(gedcom.parse_date('AFT FEB 1900').earliest, day(1900, 3, 1))
+        self.assertEqual(gedcom.parse_date('BET 1820 AND 1825'), gedcom.DateRange(day(1820, 1, 1), day(1825, 12, 31)))
+        self.assertEqual(gedcom.parse_date('FROM 3 MAR 1900 TO 1901'), gedcom.DateRange(day(1900, 3, 3), day(1901, 12, 31)))
+        self.assertEqual(gedcom.parse_date('INT 1900 (census)'), gedcom.parse_date('1900'))
+        self.assertEqual(str(gedcom.parse_date('JAN 1900')), '1900-01-01/1900-01-31')
+
+    def test_comparisons(self):
+        year, later, month = gedcom.parse_date('1900'), gedcom.parse_date('1901'), gedcom.parse_date('JUN 1900')
+        self.assertEqual((year.before(later), year.before(month), later.before(year), year.before(None)), (True, None, False, None))
+        self.assertTrue(month.possibly_before(year) and year.possibly_before(month))
+        self.assertFalse(month.definitely_before(year))
+        self.assertEqual(gedcom.parse_date('29 FEB 2000').plus_months(12), gedcom.DateRange(day(2001, 2, 28)))
+
+    def test_invalid_dates(self):
+        for value in (None, '', '31 FEB 2001', '29 FEB 1900', '00 JAN 1900', '001 JAN 1900', '1 JAN 0000', 'ABT', '17 APRIL 2001',
+                      '1 JAN 20011', 'BET 1900 AND 1800', 'BET 1900', 'WHEN 1900'):
+            self.assertIsNone(gedcom.parse_date(value), value)
+
+    def test_rules_report_only_definite_errors(self):
+        lines = run_checks("0 @I1@ INDI\n1 NAME Sure /A/\n1 BIRT\n2 DATE 1950\n1 DEAT\n2 DATE BEF 1940\n"
+                           "0 @I2@ INDI\n1 NAME Maybe /A/\n1 BIRT\n2 DATE ABT 1950\n1 DEAT\n2 DATE 1950\n")
+        us03 = [line for line in lines if 'not earlier than death' in line]
+        self.assertEqual(us03, ["ERROR: Individual: US06 Sure /A/: (@I1@): Birth date 1950 is not earlier than death date BEF 1940."])
+
+    def test_dates_are_parsed_at_ingest(self):
+        path = write_sample()
+        try:
+            records = dict((record.id, record) for _, record in gedcom.iter_records(path))
+        finally:
+            os.remove(path)
+        self.assertEqual(records['@I2@'].birth, gedcom.DateRange(day(1985, 2, 2)))
+        self.assertEqual(records['@I2@'].death, gedcom.DateRange(day(2020, 2, 2)))
+        self.assertEqual(records['@F1@'].marriage, gedcom.DateRange(day(2005, 1, 1)))
+        self.assertEqual(records['@I1@'].birthday, '1 JAN 1980')
+
+
+class TestRecords(unittest.TestCase):
+    def test_optional_fields_default_to_none(self):
+        individual = gedcom.Individual('@I1@')
+        self.assertIsNone(individual.death_date)
+        self.assertIsNone(individual.death)
+        self.assertEqual(gedcom.Family('@F1@').children, [])
+
+    def test_records_have_no_instance_dict(self):
+        individual = gedcom.Individual('@I1@')
+        self.assertFalse(hasattr(individual, '__dict__'))
+        with self.assertRaises(AttributeError):
+            individual.nickname = 'Johnny'
+
+    def test_pointers_share_the_interned_id(self):
+        path = write_sample()
+        try:
+            records = dict((record.id, record) for _, record in gedcom.iter_records(path))
+        finally:
+            os.remove(path)
+        self.assertIs(records['@I1@'].spouse_families[0], records['@F1@'].id)
+        self.assertIs(records['@F1@'].husband, records['@I1@'].id)
+
+
+class TestRelations(unittest.TestCase):
+    def setUp(self):
+        self.relations = gedcom.Relations()
+        self.path = write_sample(SAMPLE_GEDCOM.replace("0 TRLR\n", """0 @I4@ INDI
+1 NAME Second /Wife/
+1 SEX F
+1 FAMS @F2@
+0 @F2@ FAM
+1 HUSB @I1@
+1 WIFE @I4@
+1 CHIL @I5@
+0 TRLR
+"""))
+        for kind, record in gedcom.iter_records(self.path):
+            self.relations.add(kind, record)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_every_fams_is_kept(self):
+        self.assertEqual(self.relations.spouse_families['@I1@'], ('@F1@', '@F2@'))
+
+    def test_links_are_taken_from_both_ends(self):
+        # @I5@ has no INDI record, only the CHIL line in @F2@
+        self.assertEqual(self.relations.child_families['@I5@'], ('@F2@',))
+        self.assertCountEqual(self.relations.family_parents['@F2@'], ('@I1@', '@I4@'))
+        self.assertEqual(self.relations.family_children['@F1@'], ('@I3@',))
+
+    def test_parents_and_siblings(self):
+        self.assertEqual(self.relations.parents('@I3@'), ['@I1@', '@I2@'])
+        self.assertEqual(self.relations.parents('@I1@'), [])
+        self.assertEqual(self.relations.siblings('@I3@'), set())
+
+
+def build_relations(*family_specs):
+    # Each spec is (family id, husband, wife, [children])
+    relations = gedcom.Relations()
+    for family_id, husband, wife, children in family_specs:
+        family = gedcom.Family(family_id)
+        family.husband = husband
+        family.wife = wife
+        family.children = list(children)
+        relations.add('FAM', family)
+    return relations
+
+
+class TestKinship(unittest.TestCase):
+    def setUp(self):
+        self.relations = build_relations(
+            ('@F1@', '@I1@', '@I2@', ['@I3@', '@I4@']),
+            ('@F2@', '@I3@', '@I5@', ['@I6@']),
+            ('@F3@', '@I7@', '@I4@', ['@I8@']),
+            ('@F4@', '@I6@', '@I9@', ['@I10@']),
+        )
+
+    def assertKinship(self, a, b, expected, name):
+        kinship = self.relations.kinship(a, b)
+        self.assertEqual(kinship, expected)
+        self.assertEqual(gedcom.kinship_name(kinship), name)
+
+    def test_direct_lines(self):
+        self.assertKinship('@I1@', '@I10@', (0, 3), 'great-grandparent')
+        self.assertKinship('@I10@', '@I3@', (2, 0), 'grandchild')
+        self.assertKinship('@I3@', '@I6@', (0, 1), 'parent')
+
+    def test_collateral_lines(self):
+        self.assertKinship('@I3@', '@I4@', (1, 1), 'sibling')
+        self.assertKinship('@I3@', '@I8@', (1, 2), 'uncle/aunt')
+        self.assertKinship('@I8@', '@I3@', (2, 1), 'nephew/niece')
+        self.assertKinship('@I6@', '@I8@', (2, 2), 'first cousin')
+        self.assertKinship('@I10@', '@I8@', (3, 2), 'first cousin once removed')
+
+    def test_unrelated_and_depth_limit(self):
+        self.assertKinship('@I5@', '@I7@', None, 'unrelated')
+        self.assertIsNone(self.relations.kinship('@I10@', '@I8@', max_depth=2))
+
+
+def gedcom_family(family_id, birth_dates, first_child=1):
+    # A family whose children were born on the given dates
+    lines = []
+    child_ids = []
+    for offset, birth_date in enumerate(birth_dates):
+        child_id = f"@I{family_id}{first_child + offset}@"
+        child_ids.append(child_id)
+        lines += [f"0 {child_id} INDI", f"1 NAME Child{offset} /F{family_id}/", "1 SEX F",
+                  "1 BIRT", f"2 DATE {birth_date}", f"1 FAMC @F{family_id}@"]
+    lines += [f"0 @F{family_id}@ FAM"] + [f"1 CHIL {child_id}" for child_id in child_ids]
+    return "\n".join(lines) + "\n"
+
+def run_checks(text):
+    gedcom.individuals.clear()
+    gedcom.families.clear()
+    gedcom.relations.clear()
+    path = write_sample("0 HEAD\n" + text + "0 TRLR\n")
+    try:
+        gedcom.process_gedcom(path)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            gedcom.check_anomalies()
+        return buffer.getvalue().splitlines()
+    finally:
+        os.remove(path)
+
+
+class TestSiblingChecks(unittest.TestCase):
+    def test_spacing_reports_every_family(self):
+        output = run_checks(gedcom_family(1, ['1 JAN 2000', '1 MAY 2000']) +
+                            gedcom_family(2, ['1 JAN 2000', '1 JAN 2001']) +
+                            gedcom_family(3, ['1 MAR 2001', '1 JAN 2000', '1 JUN 2000']))
+        spacing = [line for line in output if 'US13' in line]
+        self.assertEqual(spacing, ["ERROR: US13: Family: @F1@: has sibling too young.",
+                                   "ERROR: US13: Family: @F3@: has sibling too young."])
+
+    def test_twins_are_not_too_close(self):
+        output = run_checks(gedcom_family(1, ['1 JAN 2000', '2 JAN 2000', '1 JAN 2002']))
+        self.assertFalse([line for line in output if 'US13' in line])
+
+    def test_twins_do_not_hide_a_close_pair(self):
+        # Both neighbouring gaps are twins, but the first and last births are 2 days apart
+        output = run_checks(gedcom_family(1, ['1 JAN 2000', '2 JAN 2000', '3 JAN 2000']))
+        self.assertEqual([line for line in output if 'US13' in line], ["ERROR: US13: Family: @F1@: has sibling too young."])
+
+    def test_multiple_births(self):
+        output = run_checks(gedcom_family(1, ['1 JAN 2000'] * 6) +
+                            gedcom_family(2, ['1 JAN 2000'] * 5 + ['1 JAN 2002']) +
+                            gedcom_family(3, ['1 JAN 2000'] * 3 + ['1 JAN 2003'] * 6))
+        births = [line for line in output if 'US14' in line]
+        self.assertEqual(births, ["ERROR: US14: Family: @F1@: has multiple births.",
+                                  "ERROR: US14: Family: @F3@: has multiple births."])
+
+    def test_months_between(self):
+        self.assertEqual(gedcom.months_between(datetime(2000, 1, 31), datetime(2000, 9, 30)), 7)
+        self.assertEqual(gedcom.months_between(datetime(2000, 1, 31), datetime(2000, 10, 1)), 8)
+
+
+class TestParallelChecks(unittest.TestCase):
+    def test_pool_output_matches_sequential_run(self):
+        text = ''.join(gedcom_family(n, ['1 JAN 2000', '1 FEB 2000'] + ['1 JAN 2005'] * (n % 8)) for n in range(1, 12))
+        sequential = run_checks(text)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            gedcom.check_anomalies(workers=3)
+        self.assertTrue(sequential)
+        self.assertEqual(buffer.getvalue().splitlines(), sequential)
+
+    def test_pool_output_matches_sequential_run_with_a_cycle(self):
+        # US17 reports families and then people, which shards would interleave
+        text = ''.join(f"0 @I{n}@ INDI\n1 NAME P{n} /C/\n" for n in range(12))
+        text += ''.join(f"0 @F{n}@ FAM\n1 HUSB @I{n}@\n1 CHIL @I{(n + 1) % 12}@\n" for n in range(12))
+        text += "0 @F12@ FAM\n1 HUSB @I0@\n1 WIFE @I6@\n"
+        sequential = run_checks(text)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            gedcom.check_anomalies(workers=3)
+        self.assertEqual(len([line for line in sequential if 'own ancestor' in line]), 12)
+        self.assertEqual(buffer.getvalue().splitlines(), sequential)
+
+    def test_shards_cover_every_record_once(self):
+        records = dict((n, n) for n in range(10))
+        seen = []
+        try:
+            for index in range(3):
+                gedcom.rules._shard = (index, 3)
+                seen.extend(gedcom.in_shard(records))
+        finally:
+            gedcom.rules._shard = (0, 1)
+        self.assertEqual(seen, list(range(10)))
+
+
+class TestRuleRegistry(unittest.TestCase):
+    def stories(self, **selection):
+        return [r.story for r in gedcom.select_rules(**selection)]
+
+    def test_every_rule_is_registered_once(self):
+        stories = self.stories()
+        self.assertEqual(len(stories), len(set(stories)))
+        self.assertIn('US19', stories)
+        for registered in gedcom.RULES:
+            self.assertIn(registered.cost, gedcom.COSTS)
+
+    def test_include_and_exclude_by_story_or_cost(self):
+        self.assertEqual(self.stories(include=['us19', 'US04']), ['US04', 'US19'])
+        self.assertEqual(self.stories(include=['expensive']), ['US19', 'US20'])
+        self.assertNotIn('US19', self.stories(exclude=['expensive']))
+        self.assertEqual(self.stories(include=['expensive'], exclude=['US20']), ['US19'])
+
+    def test_max_cost(self):
+        costs = set(r.cost for r in gedcom.select_rules(max_cost='moderate'))
+        self.assertEqual(costs, {'cheap', 'moderate'})
+
+    def test_unknown_names_are_rejected(self):
+        with self.assertRaises(ValueError):
+            gedcom.select_rules(include=['US99'])
+        with self.assertRaises(ValueError):
+            gedcom.select_rules(max_cost='free')
+
+    def test_check_anomalies_runs_only_selected_rules(self):
+        text = gedcom_family(1, ['1 JAN 2000', '1 FEB 2000'] + ['1 JAN 2005'] * 6)
+        self.assertTrue([line for line in run_checks(text) if 'US14' in line])
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            gedcom.check_anomalies(include=['US13'])
+        self.assertEqual(buffer.getvalue().splitlines(), ["ERROR: US13: Family: @F1@: has sibling too young."])
+
+
+class TestRevalidate(unittest.TestCase):
+    def setUp(self):
+        run_checks(SAMPLE_GEDCOM.replace("0 HEAD\n1 CHAR UTF-8\n", "").replace("0 TRLR\n", "") +
+                   gedcom_family(9, ['1 JAN 1990', '1 JAN 1995']))
+        self.anomalies = gedcom.collect_anomalies()
+
+    def edited_child(self, birthday):
+        child = gedcom.Individual('@I3@')
+        child.name = 'Child /Doe/'
+        child.sex = 'M'
+        child.birthday = birthday
+        child.birth = gedcom.parse_date(birthday)
+        child.child_families = ('@F1@',)
+        return child
+
+    def test_edit_adds_and_clears_an_anomaly(self):
+        self.assertFalse([line for line in self.anomalies.lines() if 'US08' in line])
+        rechecked = gedcom.revalidate(self.anomalies, [('INDI', self.edited_child('1 JAN 2000'))])
+        self.assertIn('@I3@', rechecked)
+        self.assertNotIn('@F9@', rechecked)
+        self.assertEqual([line for line in self.anomalies.lines() if 'US08' in line],
+                         ["ERROR: US08: Individual: Child /Doe/ (@I3@): has birth date before the marriage of parents."])
+        gedcom.revalidate(self.anomalies, [('INDI', self.edited_child('3 MAR 2010'))])
+        self.assertFalse([line for line in self.anomalies.lines() if 'US08' in line])
+
+    def test_unchanged_records_are_skipped(self):
+        self.assertEqual(gedcom.revalidate(self.anomalies, [('INDI', self.edited_child('3 MAR 2010'))]), set())
+
+    def test_revalidate_file_matches_a_full_run(self):
+        edited = SAMPLE_GEDCOM.replace("2 DATE 3 MAR 2010", "2 DATE 1 JAN 2000").replace("1 CHIL @I3@\n", "")
+        path = write_sample(edited)
+        try:
+            gedcom.revalidate_file(self.anomalies, path)
+        finally:
+            os.remove(path)
+        self.assertNotIn('@I91@', gedcom.individuals)
+        self.assertEqual(sorted(self.anomalies.lines()), sorted(gedcom.collect_anomalies().lines()))
+
+    def test_edits_keep_links_in_file_order(self):
+        child = gedcom.Individual('@I91@')
+        child.name = 'Renamed /F9/'
+        child.child_families = ('@F9@',)
+        gedcom.revalidate(self.anomalies, [('INDI', child)])
+        self.assertEqual(gedcom.relations.family_children['@F9@'], ('@I91@', '@I92@'))
+        self.assertEqual(list(self.anomalies.lines()), list(gedcom.collect_anomalies().lines()))
+        # A new first child of @F9@, listed in the file before the others
+        text = ("0 HEAD\n0 @I90@ INDI\n1 NAME New /F9/\n1 FAMC @F9@\n" + SAMPLE_GEDCOM.replace("0 HEAD\n1 CHAR UTF-8\n", "")
+                .replace("0 TRLR\n", "") + gedcom_family(9, ['1 JAN 1990', '1 JAN 1995']).replace("1 NAME Child0", "1 NAME Renamed")
+                + "0 TRLR\n")
+        path = write_sample(text)
+        try:
+            gedcom.revalidate_file(self.anomalies, path)
+        finally:
+            os.remove(path)
+        self.assertEqual(gedcom.relations.family_children['@F9@'], ('@I90@', '@I91@', '@I92@'))
+        self.assertEqual(sorted(self.anomalies.lines()), sorted(gedcom.collect_anomalies().lines()))
+
+
+class TestRecordIndex(unittest.TestCase):
+    def setUp(self):
+        self.path = write_sample(SAMPLE_GEDCOM)
+        self.index_path = self.path + '.idx'
+
+    def tearDown(self):
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_get_parses_only_the_requested_record(self):
+        with gedcom.RecordIndex(self.path) as index:
+            self.assertEqual(sorted(index), ['@F1@', '@I1@', '@I2@', '@I3@'])
+            kind, jane = index.get('@I2@')
+            self.assertEqual(kind, 'INDI')
+            self.assertEqual((jane.name, jane.death_date, jane.spouse_families), ('Jane /Doe/', '2 FEB 2020', ('@F1@',)))
+            self.assertEqual(index['@F1@'].children, ['@I3@'])
+            self.assertIsNone(index.get('@I9@'))
+            with self.assertRaises(KeyError):
+                index['@I9@']
+
+    def test_saved_index_is_reused_until_the_file_changes(self):
+        gedcom.RecordIndex(self.path, self.index_path).close()
+        with open(self.index_path) as index_file:
+            saved = json.load(index_file)
+        saved['offsets']['@I7@'] = saved['offsets']['@I1@']
+        with open(self.index_path, 'w') as index_file:
+            json.dump(saved, index_file)
+        with gedcom.RecordIndex(self.path, self.index_path) as index:
+            self.assertIn('@I7@', index)
+        with open(self.path, 'a') as file:
+            file.write("0 @I4@ INDI\n1 NAME Late /Doe/\n")
+        with gedcom.RecordIndex(self.path, self.index_path) as index:
+            self.assertNotIn('@I7@', index)
+            self.assertEqual(index['@I4@'].name, 'Late /Doe/')
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.path = write_sample(SAMPLE_GEDCOM)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        os.remove(self.path)
+
+    def test_unchanged_file_is_loaded_from_the_snapshot(self):
+        self.assertFalse(gedcom.load_gedcom(self.path, self.cache_dir))
+        parsed = {record_id: gedcom.incremental._record_state(record) for record_id, record in gedcom.individuals.items()}
+        gedcom.individuals.clear()
+        self.assertTrue(gedcom.load_gedcom(self.path, self.cache_dir))
+        self.assertEqual({record_id: gedcom.incremental._record_state(record) for record_id, record in gedcom.individuals.items()}, parsed)
+        self.assertEqual(gedcom.relations.parents('@I3@'), ['@I1@', '@I2@'])
+
+    def test_changed_content_or_parser_version_misses(self):
+        gedcom.load_gedcom(self.path, self.cache_dir)
+        with open(self.path, 'w') as file:
+            file.write(SAMPLE_GEDCOM.replace('Jane', 'Joan'))
+        self.assertFalse(gedcom.load_gedcom(self.path, self.cache_dir))
+        self.assertEqual(gedcom.individuals['@I2@'].name, 'Joan /Doe/')
+        snapshot = os.path.join(self.cache_dir, f"{gedcom.file_digest(self.path)}-v{gedcom.PARSER_VERSION}.snap")
+        with open(snapshot, 'r+b') as file:
+            file.write(b'GEDSNAP1999')
+        self.assertFalse(gedcom.load_gedcom(self.path, self.cache_dir))
+        self.assertTrue(gedcom.load_gedcom(self.path, self.cache_dir))
+
+    def test_least_recently_used_snapshots_are_evicted(self):
+        gedcom.load_gedcom(self.path, self.cache_dir)
+        first = os.listdir(self.cache_dir)
+        with open(self.path, 'w') as file:
+            file.write(SAMPLE_GEDCOM.replace('Jane', 'Joan'))
+        gedcom.load_gedcom(self.path, self.cache_dir, max_cache_bytes=1)
+        remaining = os.listdir(self.cache_dir)
+        self.assertEqual(len(remaining), 1)
+        self.assertNotEqual(remaining, first)
+
+
+class TestSqliteStore(unittest.TestCase):
+    TREE = """0 @I1@ INDI
+1 NAME Leap /Day/
+1 SEX F
+1 BIRT
+2 DATE 29 FEB 2000
+1 DEAT
+2 DATE 1 JAN 2013
+1 FAMS @F1@
+0 @I2@ INDI
+1 NAME Old /Man/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 2020
+0 @F1@ FAM
+1 HUSB @I2@
+1 WIFE @I1@
+1 MARR
+2 DATE 27 FEB 2014
+0 @F2@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 MARR
+2 DATE 28 FEB 2014
+0 @F3@ FAM
+1 HUSB @I2@
+1 WIFE @I1@
+0 @I2@ INDI
+1 NAME Young /Man/
+1 SEX M
+1 BIRT
+2 DATE 1 JAN 2001
+"""
+
+    def test_sql_rules_print_what_the_in_memory_rules_print(self):
+        stories = ['US02', 'US05', 'US10', 'US24']
+        run_checks(self.TREE)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            gedcom.check_anomalies(include=stories)
+        expected = buffer.getvalue().splitlines()
+        path = write_sample("0 HEAD\n" + self.TREE + "0 TRLR\n")
+        try:
+            with gedcom.SqliteStore(':memory:') as store:
+                store.load(path, batch_size=2)
+                buffer = io.StringIO()
+                with redirect_stdout(buffer):
+                    self.assertEqual(store.check_anomalies(), ['US05', 'US02', 'US10', 'US24'])
+        finally:
+            os.remove(path)
+        self.assertEqual(buffer.getvalue().splitlines(), expected)
+        self.assertIn("ERROR: US10: Family: @F1@: has marriage date before 14 years of age of mother.", expected)
+        self.assertNotIn("ERROR: US10: Family: @F2@: has marriage date before 14 years of age of father.", expected)
+        self.assertEqual(len([line for line in expected if 'Duplicate spouses' in line]), 2)
+
+
+class TestBatchCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.directory, 'out')
+        for name, text in (('a/tree.ged', SAMPLE_GEDCOM), ('b/tree.ged', SAMPLE_GEDCOM.replace('3 MAR 2010', '1 JAN 2000')), ('notes.txt', '')):
+            os.makedirs(os.path.dirname(os.path.join(self.directory, name)), exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w') as file:
+                file.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *argv):
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            status = gedcom.main(['--jobs', '1', '--output-dir', self.output_dir] + list(argv))
+        with open(os.path.join(self.output_dir, 'summary.json')) as summary:
+            return status, json.load(summary)
+
+    def test_directory_is_searched_and_results_written_per_file(self):
+        status, summary = self.run_main(self.directory, '--rules', 'US01,US02')
+        self.assertEqual(status, gedcom.EXIT_OK)
+        self.assertEqual((summary['files'], summary['ok']), (2, 2))
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['summary.json', 'tree-2.anomalies.txt', 'tree-2.txt', 'tree.anomalies.txt', 'tree.txt'])
+
+    def test_exit_status_reports_anomalies_and_failures(self):
+        status, summary = self.run_main(os.path.join(self.directory, '*', 'tree.ged'))
+        self.assertEqual(status, gedcom.EXIT_ANOMALIES)
+        self.assertEqual([result['status'] for result in summary['results']], ['ok', 'anomalies'])
+        status, summary = self.run_main(self.directory, os.path.join(self.directory, 'missing.ged'))
+        self.assertEqual(status, gedcom.EXIT_FAILED)
+        self.assertEqual(summary['failed'], 1)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_tree_parses_to_the_requested_size(self):
+        path = write_sample(benchmark.generate_tree(300, seed=1))
+        try:
+            gedcom.load_gedcom(path)
+        finally:
+            os.remove(path)
+        self.assertGreaterEqual(len(gedcom.individuals), 300)
+        self.assertLess(len(gedcom.individuals), 320)
+        self.assertTrue(any(gedcom.relations.parents(person_id) for person_id in gedcom.individuals))
+
+    def test_compare_flags_slowdowns_and_steeper_growth(self):
+        def results(us01_small, us01_large):
+            return {'sizes': {'1000': {'parse': 0.1, 'report': 0.1, 'rules': {'US01': us01_small}},
+                              '100000': {'parse': 10.0, 'report': 10.0, 'rules': {'US01': us01_large}}}}
+        baseline = results(0.01, 1.0)
+        self.assertEqual(benchmark.compare(results(0.011, 1.2), baseline), [])
+        regressions = benchmark.compare(results(0.01, 100.0), baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('US01 grows as n^2.00, was n^1.00', regressions)
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        run_checks(SAMPLE_GEDCOM.replace("0 HEAD\n1 CHAR UTF-8\n", "").replace("0 TRLR\n", ""))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_csv_rows_follow_the_table_report(self):
+        paths = gedcom.export_individuals_and_families(os.path.join(self.directory, 'report.txt'), 'csv')
+        self.assertEqual([os.path.basename(path) for path in paths], ['report.individuals.csv', 'report.families.csv'])
+        with open(paths[0], newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], list(gedcom.INDIVIDUAL_COLUMNS))
+        self.assertEqual([row[0] for row in rows[1:]], ['@I1@', '@I2@', '@I3@'])
+        self.assertEqual(rows[3], ['@I3@', 'Child /Doe/', 'M', '3 MAR 2010', '@F1@', ''])
+        with open(paths[1], newline='') as file:
+            self.assertEqual(list(csv.reader(file))[1], ['@F1@', '@I1@', 'John /Doe/', '@I2@', 'Jane /Doe/', '@I3@'])
+
+    def test_jsonl_has_one_object_per_line(self):
+        paths = gedcom.export_individuals_and_families(os.path.join(self.directory, 'report.txt'), 'jsonl')
+        with open(paths[0]) as file:
+            people = [json.loads(line) for line in file]
+        self.assertEqual(people[1], {'id': '@I2@', 'name': 'Jane /Doe/', 'sex': 'F', 'birthday': '2 FEB 1985',
+                                     'child_families': [], 'spouse_families': ['@F1@']})
+        with self.assertRaises(ValueError):
+            gedcom.export_individuals_and_families(paths[0], 'xml')
+
+
+class TestDateEngine(unittest.TestCase):
+    STORIES = ['US01', 'US02', 'US03', 'US04', 'US05', 'US06', 'US08', 'US09', 'US10']
+    TREE = """0 @I1@ INDI
+1 NAME Dad /Leap/
+1 BIRT
+2 DATE 29 FEB 2000
+1 DEAT
+2 DATE 31 MAY 2013
+0 @I2@ INDI
+1 NAME Mum /Leap/
+1 BIRT
+2 DATE 1 MAR 2000
+1 DEAT
+2 DATE 1 JAN 2100
+0 @I3@ INDI
+1 NAME Late /Leap/
+1 BIRT
+2 DATE 1 MAR 2014
+1 FAMC @F1@
+0 @I4@ INDI
+1 NAME Edge /Leap/
+1 BIRT
+2 DATE 28 FEB 2014
+1 FAMC @F1@
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 MARR
+2 DATE 28 FEB 2014
+1 DIV
+2 DATE 1 JAN 2013
+0 @F2@ FAM
+1 HUSB @I9@
+1 WIFE @I2@
+1 CHIL @I3@
+1 MARR
+2 DATE 1 JAN 2200
+1 DIV
+2 DATE 1 JAN 2201
+"""
+
+    def outputs(self, text, **options):
+        run_checks(text)
+        results = []
+        for engine in gedcom.ENGINES:
+            buffer = io.StringIO()
+            with redirect_stdout(buffer):
+                gedcom.check_anomalies(include=self.STORIES, engine=engine, **options)
+            results.append(buffer.getvalue().splitlines())
+        return results
+
+    def test_vector_rules_print_what_the_python_rules_print(self):
+        python, vectorized = self.outputs(self.TREE)
+        self.assertEqual(vectorized, python)
+        self.assertIn("ERROR: US09: Individual: Late /Leap/ (@I3@): has birth date after 9 months after death date of father.", python)
+        self.assertNotIn("ERROR: US09: Individual: Edge /Leap/ (@I4@): has birth date after 9 months after death date of father.", python)
+        self.assertIn("ERROR: US10: Family: @F1@: has marriage date before 14 years of age of mother.", python)
+        self.assertNotIn("ERROR: US10: Family: @F1@: has marriage date before 14 years of age of father.", python)
+
+    def test_generated_tree_with_a_pool(self):
+        text = benchmark.generate_tree(400, seed=2).replace("0 HEAD\n1 CHAR UTF-8\n", "").replace("0 TRLR\n", "")
+        python, vectorized = self.outputs(text, workers=2)
+        self.assertTrue(python)
+        self.assertEqual(vectorized, python)
+
+    def test_add_months_clamps_like_relativedelta(self):
+        run_checks("")
+        columns = gedcom.DateColumns()
+        for day, months in (('2013-05-31', 9), ('2000-02-29', 168), ('2019-08-31', 6), ('1999-12-15', 2)):
+            expected = datetime.strptime(day, '%Y-%m-%d') + relativedelta(months=months)
+            result = columns.add_months(columns.np.array([day], dtype='datetime64[D]'), months)
+            self.assertEqual(str(result[0]), expected.strftime('%Y-%m-%d'))
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'tree.ged')
+        with open(self.path, 'w') as file:
+            file.write(SAMPLE_GEDCOM)
+        self.service = daemon.Service(daemon.TreeCache())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def request(self, method, **params):
+        return self.service.handle(json.dumps({'jsonrpc': '2.0', 'id': 7, 'method': method, 'params': params}))
+
+    def test_validate_is_cached_and_follows_edits(self):
+        first = self.request('validate', path=self.path)['result']
+        self.assertEqual(first['errors'], 0)
+        with open(self.path, 'w') as file:
+            file.write(SAMPLE_GEDCOM.replace('3 MAR 2010', '1 JAN 2000'))
+        os.utime(self.path, ns=(1, 1))
+        second = self.request('validate', path=self.path)['result']
+        self.assertEqual(second['lines'],
+                         ["ERROR: US08: Individual: Child /Doe/ (@I3@): has birth date before the marriage of parents."])
+        self.assertEqual(self.request('query', path=self.path, id='@I3@')['result']['parents'], ['@I1@', '@I2@'])
+
+    def test_least_recently_used_tree_is_evicted(self):
+        other = os.path.join(self.directory, 'other.ged')
+        shutil.copy(self.path, other)
+        self.service.cache.max_bytes = 4 * daemon.BYTES_PER_RECORD
+        self.request('parse', path=self.path)
+        self.request('parse', path=other)
+        self.assertEqual([tree['path'] for tree in self.request('stats')['result']['trees']], [other])
+
+    def test_errors_are_reported_as_json_rpc_errors(self):
+        self.assertEqual(self.service.handle('{')['error']['code'], daemon.PARSE_ERROR)
+        self.assertEqual(self.request('nope')['error']['code'], daemon.METHOD_NOT_FOUND)
+        self.assertEqual(self.request('query', path=self.path, id='@I9@')['error']['code'], daemon.INVALID_PARAMS)
+        self.assertEqual(self.request('parse', path=self.path + '.missing')['error']['code'], daemon.SERVER_ERROR)
+
+    def test_requests_over_the_socket(self):
+        socket_path = os.path.join(self.directory, 'daemon.sock')
+        server = daemon.Server(socket_path, self.service)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            self.assertEqual(daemon.call(socket_path, 'parse', path=self.path), {'individuals': 3, 'families': 1})
+            with self.assertRaises(daemon.RpcError):
+                daemon.call(socket_path, 'validate', path=self.path, rules=['US99'])
+            self.assertTrue(daemon.call(socket_path, 'shutdown'))
+        finally:
+            thread.join(5)
+            server.server_close()
+        self.assertFalse(thread.is_alive())
+
+
+class TestPackage(unittest.TestCase):
+    def test_import_has_no_side_effects_or_heavy_imports(self):
+        code = ("import sys, gedcom; "
+                "print([name for name in ('prettytable', 'dateutil', 'numpy', 'sqlite3', 'multiprocessing', 'tracemalloc') if name in sys.modules])")
+        result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (0, "[]\n", ""))
+
+    def test_optional_parts_load_on_first_use(self):
+        self.assertIs(gedcom.SqliteStore, gedcom.store.SqliteStore)
+        self.assertEqual(gedcom.EXIT_FAILED, 3)
+        with self.assertRaises(AttributeError):
+            gedcom.no_such_name
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.path = write_sample()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.remove(self.path)
+        shutil.rmtree(self.directory)
+
+    def test_phases_and_rules_are_measured(self):
+        with gedcom.Profile() as profile, redirect_stdout(io.StringIO()) as output:
+            gedcom.load_gedcom(self.path)
+            gedcom.check_anomalies(include=['US01', 'US08'])
+            gedcom.print_individuals_and_families(os.path.join(self.directory, 'report.txt'))
+        totals = {total.name: total for total in profile.totals()}
+        self.assertEqual(list(totals), ['parse', 'US01', 'US08', 'report'])
+        self.assertEqual((totals['parse'].records, totals['parse'].anomalies), (4, None))
+        self.assertEqual(totals['US01'].records, 4)
+        self.assertEqual(totals['US01'].anomalies + totals['US08'].anomalies, len(output.getvalue().splitlines()))
+        self.assertTrue(all(total.peak_bytes is not None and total.seconds >= 0 for total in totals.values()))
+        self.assertEqual([rule['name'] for rule in profile.as_dict()['rules']], ['US01', 'US08'])
+        self.assertIn('US08', profile.text())
+
+    def test_whole_tree_rules_count_their_records(self):
+        gedcom.load_gedcom(self.path)
+        with gedcom.Profile(memory=False) as profile, redirect_stdout(io.StringIO()):
+            gedcom.check_anomalies(include=['US22', 'US23', 'US24'])
+        self.assertEqual({total.name: total.records for total in profile.totals()}, {'US22': 3, 'US23': 3, 'US24': 1})
+
+    def test_hooks_see_each_shard_and_nothing_once_removed(self):
+        gedcom.load_gedcom(self.path)
+        seen = []
+        gedcom.add_hook(seen.append)
+        try:
+            with redirect_stdout(io.StringIO()):
+                gedcom.check_anomalies(workers=2, include=['US02'])
+        finally:
+            gedcom.remove_hook(seen.append)
+        self.assertEqual([(measurement.name, measurement.shard) for measurement in seen], [('US02', 0), ('US02', 1)])
+        self.assertEqual(sum(measurement.records for measurement in seen), 3)
+        with redirect_stdout(io.StringIO()):
+            gedcom.check_anomalies(include=['US02'])
+        self.assertEqual(len(seen), 2)
+
+    def test_cli_writes_a_profile_per_file(self):
+        with redirect_stdout(io.StringIO()):
+            gedcom.main([self.path, '--jobs', '1', '--output-dir', self.directory, '--rules', 'US01', '--profile', 'json'])
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        with open(os.path.join(self.directory, f"{name}.profile.json")) as file:
+            report = json.load(file)
+        self.assertEqual([phase['name'] for phase in report['phases']], ['parse', 'report'])
+        self.assertEqual(report['rules'][0]['name'], 'US01')
+
+
+class TestAncestry(unittest.TestCase):
+    def test_ancestors_at_any_depth(self):
+        # F1: I1 + I2 -> I3; F2: I3 + I4 -> I5; F3: I5 -> I6; F4: I1 marries great-grandchild I6
+        ancestry = gedcom.Ancestry(build_relations(('@F1@', '@I1@', '@I2@', ['@I3@']), ('@F2@', '@I3@', '@I4@', ['@I5@']),
+                                                   ('@F3@', '@I5@', None, ['@I6@']), ('@F4@', '@I1@', '@I6@', [])))
+        self.assertTrue(ancestry.is_ancestor('@I1@', '@I6@'))
+        self.assertTrue(ancestry.is_ancestor('@I4@', '@I6@'))
+        self.assertFalse(ancestry.is_ancestor('@I6@', '@I1@'))
+        self.assertFalse(ancestry.is_ancestor('@I2@', '@I4@'))
+        self.assertFalse(ancestry.is_ancestor('@I1@', '@I1@'))
+        self.assertFalse(ancestry.is_ancestor('@I1@', '@I99@'))
+        self.assertEqual(ancestry.cycles, [])
+
+    def test_cycles_are_reported(self):
+        ancestry = gedcom.Ancestry(build_relations(('@F1@', '@I1@', None, ['@I2@']), ('@F2@', '@I2@', None, ['@I3@']),
+                                                   ('@F3@', '@I3@', None, ['@I1@', '@I4@'])))
+        self.assertEqual([sorted(cycle) for cycle in ancestry.cycles], [['@I1@', '@I2@', '@I3@']])
+        self.assertTrue(ancestry.is_ancestor('@I2@', '@I2@'))
+        self.assertTrue(ancestry.is_ancestor('@I1@', '@I4@'))
+        self.assertFalse(ancestry.in_cycle('@I4@'))
+
+    def test_deep_chains_do_not_recurse(self):
+        depth = 5000
+        ancestry = gedcom.Ancestry(build_relations(*[(f'@F{n}@', f'@I{n}@', None, [f'@I{n + 1}@']) for n in range(depth)]))
+        self.assertTrue(ancestry.is_ancestor('@I0@', f'@I{depth}@'))
+        self.assertFalse(ancestry.is_ancestor(f'@I{depth}@', '@I0@'))
+
+    def test_relations_keep_their_ancestry_until_relinked(self):
+        import pickle
+        relations = build_relations(('@F1@', '@I1@', None, ['@I2@']))
+        ancestry = relations.ancestry()
+        self.assertIs(relations.ancestry(), ancestry)
+        family = gedcom.Family('@F2@')
+        family.husband = '@I2@'
+        family.children = ['@I3@']
+        relations.add('FAM', family)
+        self.assertIsNot(relations.ancestry(), ancestry)
+        self.assertTrue(relations.ancestry().is_ancestor('@I1@', '@I3@'))
+        relations.remove('FAM', family)
+        self.assertFalse(relations.ancestry().is_ancestor('@I1@', '@I3@'))
+        copy = pickle.loads(pickle.dumps(relations))
+        self.assertEqual([getattr(copy, name) for name in gedcom.Relations.LINKS],
+                         [getattr(relations, name) for name in gedcom.Relations.LINKS])
+        self.assertTrue(copy.ancestry().is_ancestor('@I1@', '@I2@'))
+
+    def test_us17_finds_grandparent_marriages_and_own_ancestors(self):
+        lines = run_checks("0 @I1@ INDI\n1 NAME Old /A/\n0 @I2@ INDI\n1 NAME Mid /A/\n0 @I3@ INDI\n1 NAME Young /A/\n"
+                           "0 @I4@ INDI\n1 NAME Loop /B/\n"
+                           "0 @F1@ FAM\n1 HUSB @I1@\n1 CHIL @I2@\n0 @F2@ FAM\n1 HUSB @I2@\n1 CHIL @I3@\n"
+                           "0 @F3@ FAM\n1 HUSB @I1@\n1 WIFE @I3@\n0 @F4@ FAM\n1 HUSB @I4@\n1 CHIL @I4@\n")
+        us17 = [line for line in lines if 'US17' in line]
+        self.assertEqual(us17, ["ERROR: US17: Family: @F3@: has marriage to descendants.",
+                                "ERROR: US17: Individual: Loop /B/ (@I4@): is their own ancestor."])
+
+
+class TestDuplicates(unittest.TestCase):
+    def test_names_are_normalized(self):
+        self.assertEqual(gedcom.normalize_name(' Jos\u00e9  Mar\u00eda /N\u00da\u00d1EZ/ '), ('jose maria', 'nunez'))
+        self.assertEqual(gedcom.normalize_name('John'), ('john', ''))
+        self.assertEqual(gedcom.normalize_name(None), ('', ''))
+        self.assertEqual([gedcom.soundex(name) for name in ('Robert', 'Rupert', 'Ashcraft', 'Tymczak', '')],
+                         ['R163', 'R163', 'A261', 'T522', ''])
+
+    def test_us23_finds_near_duplicates_with_the_same_birthday(self):
+        lines = run_checks("0 @I1@ INDI\n1 NAME Jonathan /Smith/\n1 BIRT\n2 DATE 1 JAN 1900\n"
+                           "0 @I2@ INDI\n1 NAME jonathon /SMITH/\n1 BIRT\n2 DATE 01 JAN 1900\n"
+                           "0 @I3@ INDI\n1 NAME Jonathan /Smith/\n1 BIRT\n2 DATE 2 JAN 1900\n"
+                           "0 @I4@ INDI\n1 NAME Mary /Jones/\n1 BIRT\n2 DATE 1 JAN 1900\n")
+        self.assertEqual([line for line in lines if 'Duplicate name' in line],
+                         ["ERROR: Individual @I2@: Duplicate name 'jonathon /SMITH/' and birthday '01 JAN 1900' found."])
+
+    def test_matches_follow_input_order_with_the_collector_on(self):
+        import gc
+        people = [gedcom.Individual(f"@I{number}@") for number in range(5)]
+        for person, name in zip(people, ['Ann /B/', 'Jon /A/', 'Ann /B/', 'John /A/', 'Ann /B/']):
+            person.name = name
+        matches = gedcom.near_duplicates(people)
+        self.assertEqual(next(matches)[:2], (people[2], people[0]))
+        self.assertTrue(gc.isenabled())
+        self.assertEqual([match[:2] for match in matches], [(people[3], people[1]), (people[4], people[0])])
+
+    def test_us16_skips_missing_names(self):
+        lines = run_checks("0 @I1@ INDI\n1 NAME Al /X/\n0 @I2@ INDI\n0 @I3@ INDI\n1 NAME  \n0 @I4@ INDI\n1 NAME Bo Y\n"
+                           "0 @F1@ FAM\n1 HUSB @I1@\n1 WIFE @I2@\n0 @F2@ FAM\n1 HUSB @I3@\n1 WIFE @I4@\n")
+        self.assertFalse([line for line in lines if 'US16' in line])
+
+    def test_us25_only_compares_siblings(self):
+        lines = run_checks("0 @I1@ INDI\n1 NAME Anne /A/\n1 BIRT\n2 DATE 1 JAN 1900\n"
+                           "0 @I2@ INDI\n1 NAME Ann\u00e9 /A/\n1 BIRT\n2 DATE 1 JAN 1900\n"
+                           "0 @I3@ INDI\n1 NAME Anne /B/\n1 BIRT\n2 DATE 1 JAN 1900\n"
+                           "0 @I4@ INDI\n1 NAME Anne /A/\n1 BIRT\n2 DATE 1 JAN 1910\n"
+                           "0 @F1@ FAM\n1 CHIL @I1@\n1 CHIL @I2@\n1 CHIL @I4@\n0 @F2@ FAM\n1 CHIL @I3@\n")
+        self.assertEqual([line for line in lines if 'US25' in line],
+                         ["ERROR: US25: Individual @I2@: Duplicate first name 'Ann\u00e9' found in family @F1@."])
+
+
+class TestParserTables(unittest.TestCase):
+    def parse(self, text):
+        return list(gedcom.parser._records_from_lines(io.StringIO(text)))
+
+    def test_dates_follow_the_level_stack(self):
+        (kind, person), = self.parse("0 @I1@ INDI\n1 BIRT\n2 PLAC Town\n3 DATE 1 JAN 1800\n2 DATE 2 FEB 1901\n"
+                                     "1 NOTE\n2 DATE 3 MAR 1902\n1 DEAT\n3 DATE 4 APR 1950\n")
+        self.assertEqual((kind, person.birthday, person.death_date), ('INDI', '2 FEB 1901', None))
+        self.assertEqual(person.birth, gedcom.DateRange(day(1901, 2, 2)))
+
+    def test_record_ids_match_the_old_pattern(self):
+        text = "".join(f"0 {tag} INDI\n1 NAME {tag}\n" for tag in ('@I12@', '@I3@x', '@I@', '@Ia1@', 'I1', '@F2@'))
+        self.assertEqual([(kind, record.id) for kind, record in self.parse(text)],
+                         [('INDI', '@I12@'), ('INDI', '@I3@x'), ('FAM', '@F2@')])
+        self.assertIsInstance(gedcom.valid_tags, frozenset)
+
+
+class TestAnomalySink(unittest.TestCase):
+    def setUp(self):
+        self.path = write_sample(SAMPLE_GEDCOM.replace('3 MAR 2010', '1 JAN 2000'))
+        gedcom.load_gedcom(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_text_sink_matches_printed_output(self):
+        with redirect_stdout(io.StringIO()) as printed:
+            gedcom.check_anomalies()
+        written = io.StringIO()
+        sink = gedcom.TextSink(written, batch=2)
+        gedcom.check_anomalies(workers=2, sink=sink)
+        self.assertEqual(written.getvalue(), printed.getvalue())
+        self.assertEqual(sum(sink.counts.values()), len(printed.getvalue().splitlines()))
+
+    def test_jsonl_sink_records_rule_severity_and_ids(self):
+        written = io.StringIO()
+        with redirect_stdout(io.StringIO()) as printed:
+            gedcom.check_anomalies(include=['US08', 'US32'], sink=gedcom.open_sink(written, 'jsonl'))
+        self.assertEqual(printed.getvalue(), "")
+        anomalies = [json.loads(line) for line in written.getvalue().splitlines()]
+        self.assertEqual([(a['rule'], a['severity'], a['records']) for a in anomalies], [('US08', 'error', ['@I3@'])])
+        self.assertIn("has birth date before the marriage of parents", anomalies[0]['message'])
+        with self.assertRaises(ValueError):
+            gedcom.open_sink(written, 'xml')
+
+    def test_cli_writes_jsonl_anomalies(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with redirect_stdout(io.StringIO()):
+                status = gedcom.main([self.path, '--jobs', '1', '--output-dir', directory, '--anomaly-format', 'jsonl'])
+            name = os.path.splitext(os.path.basename(self.path))[0]
+            with open(os.path.join(directory, f"{name}.anomalies.jsonl")) as file:
+                anomalies = [json.loads(line) for line in file]
+            with open(os.path.join(directory, 'summary.json')) as file:
+                result = json.load(file)['results'][0]
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(status, gedcom.EXIT_ANOMALIES)
+        self.assertEqual(result['errors'], sum(1 for anomaly in anomalies if anomaly['severity'] == 'error'))
+        self.assertEqual(result['lines'], len(anomalies))
+
+
+class TestParallelParse(unittest.TestCase):
+    def setUp(self):
+        # A duplicate ID and CRLF line ends on top of a generated tree
+        text = benchmark.generate_tree(400, seed=3) + "0 @I5@ INDI\n1 NAME Again /Dup/\n"
+        self.path = write_sample(text.replace("\n", "\r\n"))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def tree_state(self):
+        def fields(records):
+            return [(record_id, [getattr(record, name) for name in type(record).__slots__]) for record_id, record in records.items()]
+        relations = gedcom.relations
+        return fields(gedcom.individuals), fields(gedcom.families), [getattr(relations, name) for name in gedcom.Relations.LINKS]
+
+    def test_chunks_start_at_level_zero_lines(self):
+        ranges = gedcom.parser.chunk_ranges(self.path, 8, min_chunk_bytes=1)
+        self.assertEqual(len(ranges), 8)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (0, os.path.getsize(self.path)))
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertTrue(data[next_start:next_start + 2] == b'0 ' and data[next_start - 1:next_start] == b'\n')
+
+    def test_parallel_parse_matches_sequential_parse(self):
+        gedcom.load_gedcom(self.path)
+        expected = self.tree_state()
+        gedcom.tree._install_tree(({}, {}, gedcom.Relations()))
+        gedcom.process_gedcom(self.path, workers=3, min_chunk_bytes=1)
+        self.assertEqual(self.tree_state(), expected)
+        self.assertEqual(gedcom.individuals['@I5@'].name, 'Again /Dup/')
+
+    def test_collector_stays_on_between_records(self):
+        import gc
+        records = gedcom.parser._parallel_records(self.path, 3, min_chunk_bytes=1)
+        next(records)
+        self.assertTrue(gc.isenabled())
+        records.close()
+        gedcom.process_gedcom(self.path, workers=3, min_chunk_bytes=1)
+        self.assertTrue(gc.isenabled())
+
+
 if __name__ == '__main__':
     unittest.main()